@@ -0,0 +1,29 @@
+"""borrowing reminded_at
+
+Revision ID: 02f51786f394
+Revises: e7a2c95d1b38
+Create Date: 2026-10-18 09:14:27.502816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '02f51786f394'
+down_revision: Union[str, None] = 'e7a2c95d1b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: no table rewrite
+    op.add_column('borrowings', sa.Column('reminded_at', postgresql.TIMESTAMP(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('borrowings', 'reminded_at')
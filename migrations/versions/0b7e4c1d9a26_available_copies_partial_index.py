@@ -0,0 +1,30 @@
+"""available copies partial index
+
+Revision ID: 0b7e4c1d9a26
+Revises: f2c6a8d9b417
+Create Date: 2026-10-17 18:31:44.120578
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4c1d9a26'
+down_revision: Union[str, None] = 'f2c6a8d9b417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_book_copies_available_book_id', 'book_copies', ['book_id'], unique=False,
+                        postgresql_where=sa.text("status = 'available'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_book_copies_available_book_id', table_name='book_copies', postgresql_concurrently=True)
@@ -0,0 +1,52 @@
+"""holds
+
+Revision ID: 5d3f9e2a7c08
+Revises: 0b7e4c1d9a26
+Create Date: 2026-10-17 19:40:03.518227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d3f9e2a7c08'
+down_revision: Union[str, None] = '0b7e4c1d9a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('copy_id', sa.Integer(), nullable=True),
+    sa.Column('status', postgresql.VARCHAR(length=20), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('ready_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+    sa.ForeignKeyConstraint(['copy_id'], ['book_copies.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_holds_user_id'), 'holds', ['user_id'], unique=False)
+    op.create_index('ix_holds_waiting_book_id_id', 'holds', ['book_id', 'id'], unique=False,
+                    postgresql_where=sa.text("status = 'waiting'"))
+    op.create_index('ix_holds_ready_expires_at', 'holds', ['expires_at'], unique=False,
+                    postgresql_where=sa.text("status = 'ready'"))
+    op.create_index('ux_holds_active_user_id_book_id', 'holds', ['user_id', 'book_id'], unique=True,
+                    postgresql_where=sa.text("status IN ('waiting', 'ready')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ux_holds_active_user_id_book_id', table_name='holds')
+    op.drop_index('ix_holds_ready_expires_at', table_name='holds')
+    op.drop_index('ix_holds_waiting_book_id_id', table_name='holds')
+    op.drop_index(op.f('ix_holds_user_id'), table_name='holds')
+    op.drop_table('holds')
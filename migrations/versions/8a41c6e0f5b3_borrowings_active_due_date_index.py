@@ -0,0 +1,30 @@
+"""borrowings active due_date index
+
+Revision ID: 8a41c6e0f5b3
+Revises: 5d3f9e2a7c08
+Create Date: 2026-10-17 20:52:19.664301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41c6e0f5b3'
+down_revision: Union[str, None] = '5d3f9e2a7c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_borrowings_active_due_date', 'borrowings', ['due_date'], unique=False,
+                        postgresql_where=sa.text("status = 'ACTIVE'"), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_borrowings_active_due_date', table_name='borrowings', postgresql_concurrently=True)
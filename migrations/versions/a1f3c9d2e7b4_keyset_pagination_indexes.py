@@ -0,0 +1,38 @@
+"""keyset pagination indexes
+
+Revision ID: a1f3c9d2e7b4
+Revises: 3bcfd775b569
+Create Date: 2026-10-17 09:12:44.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c9d2e7b4'
+down_revision: Union[str, None] = '3bcfd775b569'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_title_id', 'books', ['title', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_borrowings_borrowed_date_id', 'borrowings', ['borrowed_date', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_borrowings_user_id_borrowed_date_id', 'borrowings',
+                        ['user_id', 'borrowed_date', 'id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_borrowings_user_id_borrowed_date_id', table_name='borrowings',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_borrowings_borrowed_date_id', table_name='borrowings', postgresql_concurrently=True)
+        op.drop_index('ix_books_title_id', table_name='books', postgresql_concurrently=True)
@@ -0,0 +1,58 @@
+"""borrowing events
+
+Revision ID: b6d2e8f41a7c
+Revises: 8a41c6e0f5b3
+Create Date: 2026-10-17 22:06:37.801245
+
+"""
+from datetime import date, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e8f41a7c'
+down_revision: Union[str, None] = '8a41c6e0f5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Later months are created by the ensure_partitions Celery task
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.create_table('borrowing_events',
+    # BIGSERIAL: Postgres before 17 has no identity columns on partitioned tables
+    sa.Column('id', postgresql.BIGINT(), autoincrement=True, nullable=False),
+    sa.Column('changed_at', postgresql.TIMESTAMP(), nullable=False),
+    sa.Column('borrowing_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='borrowingstatus', create_type=False), nullable=False),
+    sa.Column('changed_by', sa.Integer(), nullable=True),
+    sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'changed_at'),
+    postgresql_partition_by='RANGE (changed_at)'
+    )
+    op.create_index('ix_borrowing_events_borrowing_id_changed_at', 'borrowing_events',
+                    ['borrowing_id', 'changed_at', 'id'], unique=False,
+                    postgresql_include=['user_id', 'status', 'changed_by', 'notes'])
+    op.create_index('ix_borrowing_events_user_id_changed_at', 'borrowing_events',
+                    ['user_id', 'changed_at', 'id'], unique=False,
+                    postgresql_include=['borrowing_id', 'status', 'changed_by', 'notes'])
+
+    op.execute("CREATE TABLE borrowing_events_default PARTITION OF borrowing_events DEFAULT")
+    month = date.today().replace(day=1)
+    for _ in range(MONTHS_AHEAD + 1):
+        next_month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+        op.execute(f"CREATE TABLE borrowing_events_{month:%Y_%m} PARTITION OF borrowing_events "
+                   f"FOR VALUES FROM ('{month}') TO ('{next_month}')")
+        month = next_month
+
+
+def downgrade() -> None:
+    # Dropping the parent drops its partitions and indexes
+    op.drop_table('borrowing_events')
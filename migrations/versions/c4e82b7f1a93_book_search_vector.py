@@ -0,0 +1,40 @@
+"""book search vector
+
+Revision ID: c4e82b7f1a93
+Revises: a1f3c9d2e7b4
+Create Date: 2026-10-17 11:40:03.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e82b7f1a93'
+down_revision: Union[str, None] = 'a1f3c9d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Nullable without default: a metadata-only change, no table rewrite.
+    # Existing rows are indexed afterwards by the backfill_book_search_vectors task.
+    op.add_column('books', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_search_vector', 'books', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_books_title_trgm', 'books', ['title'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_title_trgm', table_name='books', postgresql_concurrently=True)
+        op.drop_index('ix_books_search_vector', table_name='books', postgresql_concurrently=True)
+    op.drop_column('books', 'search_vector')
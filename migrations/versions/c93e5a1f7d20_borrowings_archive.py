@@ -0,0 +1,59 @@
+"""borrowings archive
+
+Revision ID: c93e5a1f7d20
+Revises: b6d2e8f41a7c
+Create Date: 2026-10-17 22:41:06.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93e5a1f7d20'
+down_revision: Union[str, None] = 'b6d2e8f41a7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, copy_id, user_id, borrowed_date, due_date, returned_date, extended_times, status, notes, accepted_by"
+
+
+def upgrade() -> None:
+    op.create_table('borrowings_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('copy_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('borrowed_date', sa.DateTime(), nullable=False),
+    sa.Column('due_date', sa.DateTime(), nullable=False),
+    sa.Column('returned_date', sa.DateTime(), nullable=True),
+    sa.Column('extended_times', sa.Integer(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='borrowingstatus', create_type=False), nullable=False),
+    sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('accepted_by', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_borrowings_archive_copy_id'), 'borrowings_archive', ['copy_id'], unique=False)
+    op.create_index('ix_borrowings_archive_borrowed_date_id', 'borrowings_archive', ['borrowed_date', 'id'],
+                    unique=False)
+    op.create_index('ix_borrowings_archive_user_id_borrowed_date_id', 'borrowings_archive',
+                    ['user_id', 'borrowed_date', 'id'], unique=False)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_borrowings_closed_at', 'borrowings', [sa.text('coalesce(returned_date, due_date)')],
+                        unique=False, postgresql_where=sa.text("status IN ('RETURNED', 'LOST')"),
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_borrowings_closed_at', table_name='borrowings', postgresql_concurrently=True)
+    # Move archived rows back before dropping the table
+    op.execute(f"INSERT INTO borrowings ({COLUMNS}) SELECT {COLUMNS} FROM borrowings_archive")
+    op.drop_index('ix_borrowings_archive_user_id_borrowed_date_id', table_name='borrowings_archive')
+    op.drop_index('ix_borrowings_archive_borrowed_date_id', table_name='borrowings_archive')
+    op.drop_index(op.f('ix_borrowings_archive_copy_id'), table_name='borrowings_archive')
+    op.drop_table('borrowings_archive')
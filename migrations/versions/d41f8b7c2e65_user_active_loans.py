@@ -0,0 +1,37 @@
+"""user active loans counter
+
+Revision ID: d41f8b7c2e65
+Revises: c93e5a1f7d20
+Create Date: 2026-10-17 23:27:48.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8b7c2e65'
+down_revision: Union[str, None] = 'c93e5a1f7d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('active_loans', postgresql.INTEGER(), nullable=False,
+                                     server_default=sa.text('0')))
+    op.execute("""
+        UPDATE users u SET active_loans = b.open
+        FROM (
+            SELECT user_id, count(*) AS open FROM borrowings
+            WHERE status NOT IN ('RETURNED', 'LOST') GROUP BY user_id
+        ) b
+        WHERE u.id = b.user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'active_loans')
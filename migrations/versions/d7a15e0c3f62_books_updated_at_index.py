@@ -0,0 +1,29 @@
+"""books updated_at index
+
+Revision ID: d7a15e0c3f62
+Revises: c4e82b7f1a93
+Create Date: 2026-10-17 14:05:51.274409
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a15e0c3f62'
+down_revision: Union[str, None] = 'c4e82b7f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_books_updated_at', 'books', ['updated_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_updated_at', table_name='books', postgresql_concurrently=True)
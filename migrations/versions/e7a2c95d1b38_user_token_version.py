@@ -0,0 +1,29 @@
+"""user token version
+
+Revision ID: e7a2c95d1b38
+Revises: d41f8b7c2e65
+Create Date: 2026-10-17 23:58:12.274619
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2c95d1b38'
+down_revision: Union[str, None] = 'd41f8b7c2e65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', postgresql.INTEGER(), nullable=False,
+                                     server_default=sa.text('0')))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
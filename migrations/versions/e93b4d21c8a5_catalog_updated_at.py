@@ -0,0 +1,36 @@
+"""catalog updated_at
+
+Revision ID: e93b4d21c8a5
+Revises: d7a15e0c3f62
+Create Date: 2026-10-17 16:22:37.550184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93b4d21c8a5'
+down_revision: Union[str, None] = 'd7a15e0c3f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('authors', 'publishers', 'categories', 'book_copies')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # A non-volatile default fills existing rows without rewriting the table; the
+        # application sets the value from then on, so the default is dropped again.
+        op.add_column(table, sa.Column('updated_at', postgresql.TIMESTAMP(), nullable=False,
+                                       server_default=sa.text('LOCALTIMESTAMP')))
+        op.alter_column(table, 'updated_at', server_default=None)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
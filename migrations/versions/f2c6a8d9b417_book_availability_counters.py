@@ -0,0 +1,59 @@
+"""book availability counters
+
+Revision ID: f2c6a8d9b417
+Revises: e93b4d21c8a5
+Create Date: 2026-10-17 17:48:12.906131
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a8d9b417'
+down_revision: Union[str, None] = 'e93b4d21c8a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+NEXT_BATCH = "SELECT max(id) FROM (SELECT id FROM books WHERE id > :last_id ORDER BY id LIMIT :size) b"
+BACKFILL = """
+    UPDATE books b SET total_copies = c.total, available_copies = c.available
+    FROM (
+        SELECT book_id, count(*) AS total, count(*) FILTER (WHERE status = 'available') AS available
+        FROM book_copies WHERE book_id > :last_id AND book_id <= :upper_id GROUP BY book_id
+    ) c
+    WHERE b.id = c.book_id
+"""
+
+
+def upgrade() -> None:
+    op.add_column('books', sa.Column('total_copies', postgresql.INTEGER(), nullable=False,
+                                     server_default=sa.text('0')))
+    op.add_column('books', sa.Column('available_copies', postgresql.INTEGER(), nullable=False,
+                                     server_default=sa.text('0')))
+    # One committed batch at a time, so no books row stays locked for the whole backfill
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = 0
+        while True:
+            upper_id = connection.execute(
+                sa.text(NEXT_BATCH), {"last_id": last_id, "size": BACKFILL_BATCH_SIZE}
+            ).scalar()
+            if upper_id is None:
+                break
+            connection.execute(sa.text(BACKFILL), {"last_id": last_id, "upper_id": upper_id})
+            last_id = upper_id
+        op.create_index('ix_books_available_title_id', 'books', ['title', 'id'], unique=False,
+                        postgresql_where=sa.text('available_copies > 0'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_books_available_title_id', table_name='books', postgresql_concurrently=True)
+    op.drop_column('books', 'available_copies')
+    op.drop_column('books', 'total_copies')
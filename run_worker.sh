@@ -1,4 +1,6 @@
 
 celery -A src.celery_tasks.c_app worker --loglevel=INFO &
 
+celery -A src.celery_tasks.c_app beat --loglevel=INFO &
+
 celery -A src.celery_tasks.c_app flower
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Event-loop lag and login throughput of password verification, inline versus on the hashing pool.
+
+Fires ``--logins`` concurrent verifications with the app's bcrypt context while a probe sleeps
+``PROBE_INTERVAL`` in a loop and records how late it wakes up: that lateness is how long every
+other request on the worker would wait. Needs the app's settings (``.env`` or the environment);
+``PASSWORD_BCRYPT_ROUNDS`` and ``PASSWORD_HASH_WORKERS`` are read from there::
+
+    python -m scripts.bench_password_hashing --logins 32
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from src.auth import utils
+from src.config import Config
+
+PROBE_INTERVAL = 0.005
+PASSWORD = "correct horse battery staple"
+
+
+async def _probe(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _measure(verify, logins: int) -> dict:
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    assert all(results)
+    lags_ms = [lag * 1000 for lag in lags]
+    return {
+        "logins/s": logins / elapsed,
+        "p99 lag ms": statistics.quantiles(lags_ms, n=100, method="inclusive")[98] if len(lags_ms) > 1 else lags_ms[0],
+        "max lag ms": max(lags_ms),
+    }
+
+
+async def main(logins: int) -> None:
+    stored = utils.passwd_context.hash(PASSWORD)
+
+    async def inline():
+        # What login did before: bcrypt on the event loop
+        await asyncio.sleep(0)
+        return utils.passwd_context.verify(PASSWORD, stored)
+
+    async def pooled():
+        valid, _ = await utils.verify_and_update_password(PASSWORD, stored)
+        return valid
+
+    print(f"{logins} concurrent logins, bcrypt cost {Config.PASSWORD_BCRYPT_ROUNDS}, {Config.PASSWORD_HASH_WORKERS} hashing threads")
+    for name, verify in (("inline", inline), ("pool", pooled)):
+        result = await _measure(verify, logins)
+        print(f"{name:>6}: " + ", ".join(f"{key} {value:.1f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -1,12 +1,17 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
 from src.auth.routes import auth_router
 from src.books.routes import book_router
 from src.borrowings.routes import router as borrowing_router
-from src.db.main import init_db
+from src.config import Config
+from src.db.main import init_db, close_db
+from src.db.redis import listen_for_invalidations, rate_limit_client
+from src.holds.routes import router as hold_router
 from src.errors import register_all_errors
+from src.ratelimit import RateLimiter, RateLimitMiddleware
 
 version = "v1"
 
@@ -14,7 +19,12 @@ version = "v1"
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    invalidations = asyncio.create_task(listen_for_invalidations())
     yield
+    invalidations.cancel()
+    with suppress(asyncio.CancelledError):
+        await invalidations
+    await close_db()
 
 
 app = FastAPI(
@@ -35,4 +45,9 @@ version_prefix = f"/api/{version}"
 app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
 app.include_router(book_router, prefix=f"{version_prefix}", tags=["book"])
 app.include_router(borrowing_router, prefix=f"{version_prefix}/borrowings", tags=["borrowing"])
+app.include_router(hold_router, prefix=f"{version_prefix}/holds", tags=["hold"])
+
+if Config.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(rate_limit_client), prefix=version_prefix,
+                       login_path=f"{version_prefix}/auth/login")
 
@@ -0,0 +1,52 @@
+"""
+``X-API-Key`` resolution. A key is looked up by its SHA-256 digest and resolved to a
+UserPrincipal, which each process caches for API_KEY_CACHE_TTL seconds. Changing a user
+publishes its id so every worker drops that user's cached principals at once.
+"""
+import time
+from functools import lru_cache
+from typing import Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.cache import LocalCache
+from src.config import Config
+from src.db.models import ApiKey, User
+from src.db.redis import on_invalidation
+from .principal import AUTH_USER_COLUMNS, USER_CHANNEL, UserPrincipal
+from .utils import ApiKeyEncryption, generate_hash_key
+
+# Key digest -> principal of its owner
+api_key_cache = LocalCache(Config.API_KEY_CACHE_SIZE)
+
+
+@lru_cache(maxsize=None)
+def api_key_cipher() -> ApiKeyEncryption:
+    return ApiKeyEncryption()
+
+
+@on_invalidation(USER_CHANNEL, api_key_cache)
+def _evict_user(user_id: str) -> None:
+    user_id = int(user_id)
+    api_key_cache.discard_where(lambda principal: principal.id == user_id)
+
+
+async def resolve_api_key(token: str, session: AsyncSession) -> Optional[UserPrincipal]:
+    """The principal owning ``token``, or None if the key is unknown. Unknown keys are not cached."""
+    hashed_key = generate_hash_key(token)
+    principal = api_key_cache.get(hashed_key)
+    if principal is not None:
+        return principal
+
+    result = await session.exec(
+        select(ApiKey.key, *AUTH_USER_COLUMNS)
+        .join(User, User.id == ApiKey.user_id)
+        .where(ApiKey.hashed_key == hashed_key)
+    )
+    row = result.first()
+    if row is None or token != api_key_cipher().decrypt_data(row.key):
+        return None
+    principal = UserPrincipal(**{column.key: getattr(row, column.key) for column in AUTH_USER_COLUMNS})
+    api_key_cache.set(hashed_key, principal, time.time() + Config.API_KEY_CACHE_TTL)
+    return principal
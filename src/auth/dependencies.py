@@ -2,12 +2,10 @@ from typing import Any, List, Union
 
 from fastapi import Depends, Request, Header
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import selectinload
-from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.main import get_session
-from src.db.models import User, ApiKey
+from src.db.models import User
 from src.db.redis import token_in_blocklist
 from src.errors import (
     InvalidToken,
@@ -16,8 +14,10 @@ from src.errors import (
     InsufficientPermission,
     UserNotActive, InvalidApiKey,
 )
+from .api_keys import resolve_api_key
+from .principal import UserPrincipal, principal_from_claims
 from .services import UserService
-from .utils import decode_token, generate_hash_key, ApiKeyEncryption
+from .utils import decode_token_cached
 
 user_service = UserService()
 
@@ -35,9 +35,9 @@ class TokenBearer(HTTPBearer):
 
             token = creds.credentials
 
-            token_data = decode_token(token)
+            token_data = decode_token_cached(token)
 
-            if not self.token_valid(token):
+            if token_data is None:
                 raise InvalidToken()
 
             if await token_in_blocklist(token_data["jti"]):
@@ -48,7 +48,7 @@ class TokenBearer(HTTPBearer):
             return token_data
 
     def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
+        token_data = decode_token_cached(token)
 
         return token_data is not None
 
@@ -56,13 +56,10 @@ class TokenBearer(HTTPBearer):
         raise NotImplementedError("Please Override this method in child classes")
 
     async def verify_api_key(self, token: str, session: AsyncSession):
-        hashed_key = generate_hash_key(token)
-        result = await session.exec(
-            select(ApiKey).where(ApiKey.hashed_key == hashed_key).options(selectinload(ApiKey.user)))
-        result = result.first()
-        if result and token == ApiKeyEncryption().decrypt_data(result.key):
-            return result.user
-        raise InvalidApiKey()
+        principal = await resolve_api_key(token, session)
+        if principal is None:
+            raise InvalidApiKey()
+        return principal
 
 
 class AccessTokenBearer(TokenBearer):
@@ -79,14 +76,30 @@ class RefreshTokenBearer(TokenBearer):
 
 async def get_current_user(
         x_api_key: str = Header(None),
-        token_details: Union[dict, User] = Depends(AccessTokenBearer()),
+        token_details: Union[dict, UserPrincipal] = Depends(AccessTokenBearer()),
         session: AsyncSession = Depends(get_session),
-):
-    if type(token_details) == User:
+) -> UserPrincipal:
+    if isinstance(token_details, UserPrincipal):
         return token_details
-    user_email = token_details["user"]["email"]
 
-    user = await user_service.get_user_by_email(user_email, session)
+    principal = await principal_from_claims(token_details["user"], session)
+
+    if principal is None:
+        # Issued before a change to the user; a refresh picks up the current claims
+        raise InvalidToken()
+
+    return principal
+
+
+async def get_current_user_record(
+        principal: UserPrincipal = Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
+) -> User:
+    """The full ``User`` row of the caller, for the few handlers that need more than the principal."""
+    user = await user_service.get_user(principal.id, session)
+
+    if user is None:
+        raise InvalidToken()
 
     return user
 
@@ -95,7 +108,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
+    def __call__(self, current_user: UserPrincipal = Depends(get_current_user)) -> Any:
         if not current_user.is_active:
             raise UserNotActive()
         if current_user.role in self.allowed_roles:
@@ -0,0 +1,81 @@
+"""
+The authenticated caller. Access tokens carry the user's id, role, active flag and
+``token_version``; a token is honoured only while its version matches the user's current one,
+which each process caches per user. Changing what a token asserts bumps the version and
+publishes the user id, so every worker rejects the older tokens at once.
+"""
+import time
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.cache import LocalCache
+from src.config import Config
+from src.db.enums import UserRole
+from src.db.models import User
+from src.db.redis import on_invalidation, publish_invalidation
+
+USER_CHANNEL = "auth:users"
+# User attributes asserted by access tokens; changing one bumps User.token_version
+TOKEN_USER_FIELDS = ("email", "role", "is_active")
+AUTH_USER_COLUMNS = (User.id, User.email, User.role, User.is_active)
+
+# User id -> token_version
+token_versions = LocalCache(Config.TOKEN_VERSION_CACHE_SIZE)
+
+
+class UserPrincipal(BaseModel):
+    """
+    What request handlers read from the current user. Not bound to a session, so it can be
+    cached and shared between requests; handlers that need more load the ``User`` row themselves.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+
+    def is_librarian(self):
+        return self.role in [UserRole.LIBRARIAN, UserRole.ADMIN]
+
+
+def token_claims(user: User) -> dict:
+    """The ``user`` claim of an access token for ``user``."""
+    return {
+        "email": user.email,
+        "user_id": str(user.id),
+        "role": user.role,
+        "active": user.is_active,
+        "ver": user.token_version,
+    }
+
+
+@on_invalidation(USER_CHANNEL, token_versions)
+def _evict_version(user_id: str) -> None:
+    token_versions.discard(int(user_id))
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Call after committing a change to a user (role, activation, keys)."""
+    await publish_invalidation(USER_CHANNEL, str(user_id), Config.TOKEN_VERSION_CACHE_TTL)
+
+
+async def principal_from_claims(claims: dict, session: AsyncSession) -> Optional[UserPrincipal]:
+    """
+    The caller described by an access token's ``user`` claim, or None if the user has changed
+    since the token was issued or no longer exists. Only a version cache miss queries the database.
+    """
+    user_id = int(claims["user_id"])
+    version = token_versions.get(user_id)
+    if version is None:
+        result = await session.exec(select(User.token_version).where(User.id == user_id))
+        version = result.first()
+        if version is None:
+            return None
+        token_versions.set(user_id, version, time.time() + Config.TOKEN_VERSION_CACHE_TTL)
+    if claims.get("ver") != version:
+        return None
+    return UserPrincipal(id=user_id, email=claims["email"], role=claims["role"], is_active=claims["active"])
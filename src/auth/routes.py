@@ -1,22 +1,29 @@
 from datetime import timedelta, datetime
 from http.client import HTTPException
+from typing import Annotated, List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.responses import JSONResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.dependencies import RefreshTokenBearer, get_current_user, AccessTokenBearer, RoleChecker
+from src.auth.dependencies import RefreshTokenBearer, get_current_user, AccessTokenBearer, RoleChecker, \
+    get_current_user_record
+from src.auth.principal import token_claims
 from src.auth.schemas import UserCreateModel, PasswordResetRequestModel, PasswordResetConfirmModel, UserLoginModel, \
-    UserBorrowingModel
+    UserSummaryModel
 from src.auth.services import UserService
-from src.auth.utils import generate_password_hash, verify_password, create_access_token, \
+from src.auth.utils import generate_password_hash, verify_and_update_password, create_access_token, \
     create_url_safe_token, decode_url_safe_token
+from src.borrowings.archive import borrowings_page
+from src.borrowings.schemas import BorrowingFilterParams, BorrowingModel
+from src.borrowings.services import BORROWING_ORDER
 from src.celery_tasks import send_email
 from src.config import Config
 from src.db.enums import UserRole
 from src.db.main import get_session
 from src.db.redis import add_jti_to_blocklist
 from src.errors import UserAlreadyExists, UserNotFound, InvalidToken, InvalidCredentials
+from src.pagination import set_next_cursor
 
 auth_router = APIRouter()
 user_service = UserService()
@@ -57,16 +64,13 @@ async def login_users(
     user = await user_service.get_user_by_email(email, session)
 
     if user is not None:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid, new_hash = await verify_and_update_password(password, user.password_hash)
 
         if password_valid:
-            access_token = create_access_token(
-                user_data={
-                    "email": user.email,
-                    "user_id": str(user.id),
-                    "role": user.role,
-                }
-            )
+            if new_hash is not None:
+                await user_service.update_user(user, {"password_hash": new_hash}, session)
+
+            access_token = create_access_token(user_data=token_claims(user))
 
             refresh_token = create_access_token(
                 user_data={"email": user.email, "user_id": str(user.id)},
@@ -87,22 +91,40 @@ async def login_users(
 
 
 @auth_router.get("/refresh_token")
-async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
+async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer()),
+                               session: AsyncSession = Depends(get_session)):
     expiry_timestamp = token_details["exp"]
+    user = await user_service.get_user(int(token_details["user"]["user_id"]), session)
 
-    if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
-        new_access_token = create_access_token(user_data=token_details["user"])
+    if user is not None and datetime.fromtimestamp(expiry_timestamp) > datetime.now():
+        # Claims come from the current row, so a refresh picks up role and activation changes
+        new_access_token = create_access_token(user_data=token_claims(user))
 
         return JSONResponse(content={"access_token": new_access_token})
 
     raise InvalidToken()
 
 
-@auth_router.get("/me", response_model=UserBorrowingModel)
-async def get_current_user(
+@auth_router.get("/me", response_model=UserSummaryModel)
+async def read_current_user(
+        user=Depends(get_current_user_record),
+        session: AsyncSession = Depends(get_session),
+):
+    borrowing_counts = await user_service.get_borrowing_counts(user.id, session)
+    return UserSummaryModel(id=user.id, email=user.email, first_name=user.first_name, last_name=user.last_name,
+                            role=user.role, active_loans=user.active_loans, borrowing_counts=borrowing_counts)
+
+
+@auth_router.get("/me/borrowings", response_model=List[BorrowingModel])
+async def read_current_user_borrowings(
+        filter_params: Annotated[BorrowingFilterParams, Query()],
+        response: Response,
         user=Depends(get_current_user),
+        session: AsyncSession = Depends(get_session),
 ):
-    return user
+    borrowings = await borrowings_page(session, BORROWING_ORDER, user_id=user.id, **filter_params.model_dump())
+    set_next_cursor(response, borrowings, BORROWING_ORDER, filter_params.limit)
+    return borrowings
 
 
 @auth_router.get("/logout")
@@ -163,7 +185,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        passwd_hash = generate_password_hash(new_password)
+        passwd_hash = await generate_password_hash(new_password)
         await user_service.update_user(user, {"password_hash": passwd_hash}, session)
 
         return JSONResponse(
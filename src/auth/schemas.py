@@ -1,11 +1,10 @@
 from enum import Enum
-from typing import List
+from typing import Dict, List
 
 from pydantic import EmailStr
 from sqlmodel import SQLModel, Field
 
-from src.borrowings.schemas import BorrowingModel
-from src.db.enums import UserRole
+from src.db.enums import BorrowingStatus, UserRole
 
 
 class RoleChoices(str, Enum):
@@ -21,12 +20,14 @@ class UserCreateModel(SQLModel):
     role: RoleChoices
 
 
-class UserBorrowingModel(SQLModel):
+class UserSummaryModel(SQLModel):
+    id: int
     email: EmailStr
     first_name: str
     last_name: str
     role: UserRole
-    borrowings: List[BorrowingModel]
+    active_loans: int
+    borrowing_counts: Dict[BorrowingStatus, int]  # archived borrowings included
 
 
 class UserLoginModel(SQLModel):
@@ -1,10 +1,16 @@
+from typing import Dict
+
+from sqlalchemy import func, union_all
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.auth.api_keys import api_key_cipher
+from src.auth.principal import TOKEN_USER_FIELDS, invalidate_user
 from src.auth.schemas import UserCreateModel
-from src.auth.utils import generate_password_hash, ApiKeyEncryption, generate_random_key, generate_hash_key
+from src.auth.utils import generate_password_hash, generate_random_key, generate_hash_key
 from src.celery_tasks import send_email
-from src.db.models import User, ApiKey
+from src.db.enums import BorrowingStatus
+from src.db.models import Borrowing, BorrowingArchive, User, ApiKey
 
 
 class UserService:
@@ -13,6 +19,22 @@ class UserService:
 
         return result.first()
 
+    async def get_user(self, user_id: int, session: AsyncSession):
+        return await session.get(User, user_id)
+
+    async def get_borrowing_counts(self, user_id: int, session: AsyncSession) -> Dict[BorrowingStatus, int]:
+        """Borrowings of a user per status, archived ones included; one index range per table."""
+        counts = union_all(*(
+            select(model.status, func.count().label("count"))
+            .where(model.user_id == user_id)
+            .group_by(model.status)
+            for model in (Borrowing, BorrowingArchive)
+        )).subquery()
+        result = await session.exec(
+            select(counts.c.status, func.sum(counts.c.count)).group_by(counts.c.status)
+        )
+        return {status: int(count) for status, count in result.all()}
+
     async def user_exists(self, email, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -28,12 +50,12 @@ class UserService:
         print("=======================")
         print(password)
 
-        new_user.password_hash = generate_password_hash(password)
+        new_user.password_hash = await generate_password_hash(password)
 
         session.add(new_user)
         await session.flush()
 
-        session.add(ApiKey(key=ApiKeyEncryption().encrypt_data(api_key),
+        session.add(ApiKey(key=api_key_cipher().encrypt_data(api_key),
                            hashed_key=generate_hash_key(api_key),
                            user_id=new_user.id))
 
@@ -54,10 +76,14 @@ class UserService:
         return new_user
 
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
+        if any(k in TOKEN_USER_FIELDS and getattr(user, k) != v for k, v in user_data.items()):
+            # Access tokens asserting the old values stop being accepted
+            user.token_version += 1
         for k, v in user_data.items():
             setattr(user, k, v)
 
         await session.commit()
+        await invalidate_user(user.id)
 
         return user
 
@@ -68,13 +94,13 @@ class UserService:
         password = "admin"
         api_key = "admin"
 
-        new_user.password_hash = generate_password_hash(password)
+        new_user.password_hash = await generate_password_hash(password)
         new_user.role = "admin"
 
         session.add(new_user)
         await session.flush()
 
-        session.add(ApiKey(key=ApiKeyEncryption().encrypt_data(api_key),
+        session.add(ApiKey(key=api_key_cipher().encrypt_data(api_key),
                            hashed_key=generate_hash_key(api_key),
                            user_id=new_user.id))
 
@@ -1,7 +1,9 @@
+import asyncio
 import hashlib
 import logging
 import uuid
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
 
 import jwt
 from datetime import timedelta, datetime
@@ -10,10 +12,14 @@ from itsdangerous import URLSafeTimedSerializer
 from cryptography.fernet import Fernet
 
 from passlib.context import CryptContext
+from src.cache import LocalCache
 from src.config import Config
 
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+passwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=Config.PASSWORD_BCRYPT_ROUNDS)
+
+# bcrypt takes ~250ms of CPU at cost 12; running it on the event loop would stall every other request
+_passwd_executor = ThreadPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix="passwd")
 
 ACCESS_TOKEN_EXPIRY = 3600
 
@@ -38,12 +44,21 @@ def generate_hash_key(key: str):
     return hashlib.sha256(key.encode()).hexdigest()
 
 
-def generate_password_hash(password: str) -> str:
-    return passwd_context.hash(password)
+async def _run_hashing(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_passwd_executor, func, *args)
+
+
+async def generate_password_hash(password: str) -> str:
+    return await _run_hashing(passwd_context.hash, password)
+
+
+async def verify_password(password: str, hash: str) -> bool:
+    return await _run_hashing(passwd_context.verify, password, hash)
 
 
-def verify_password(password: str, hash: str) -> bool:
-    return passwd_context.verify(password, hash)
+async def verify_and_update_password(password: str, hash: str) -> Tuple[bool, Optional[str]]:
+    """Verify ``password``; the second item is a new hash when the stored one uses an outdated cost or scheme."""
+    return await _run_hashing(passwd_context.verify_and_update, password, hash)
 
 
 def create_access_token(
@@ -66,6 +81,21 @@ def create_access_token(
     return token
 
 
+# Verified claims by token digest, kept until the token expires
+claims_cache = LocalCache(Config.TOKEN_CACHE_SIZE)
+
+
+def decode_token_cached(token: str) -> Optional[dict]:
+    """decode_token that verifies each distinct token once; invalid tokens are not cached."""
+    key = generate_hash_key(token)
+    token_data = claims_cache.get(key)
+    if token_data is None:
+        token_data = decode_token(token)
+        if token_data is not None:
+            claims_cache.set(key, token_data, token_data["exp"])
+    return token_data
+
+
 def decode_token(token: str) -> Optional[dict]:
     try:
         token_data = jwt.decode(
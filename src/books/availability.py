@@ -0,0 +1,121 @@
+"""
+Per-book copy counters (``books.total_copies`` / ``books.available_copies``).
+Every write that adds, removes or changes the status of a copy adjusts them in its own
+transaction with relative updates, so concurrent writers never overwrite each other.
+``reconcile_availability`` recounts from ``book_copies`` and repairs drift left by writes
+that bypass the services.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.enums import BookCopyStatus
+from src.db.models import Book, BookCopy
+from .cache import catalog_cache, book_copy_key, book_key
+from .versions import touch_books
+
+
+def copy_counts(status) -> Tuple[int, int]:
+    """(total, available) contribution of one copy with ``status``."""
+    return 1, int(status == BookCopyStatus.AVAILABLE)
+
+
+async def adjust_availability(session: AsyncSession, book_id: int, total: int = 0, available: int = 0) -> None:
+    if not total and not available:
+        return
+    books = Book.__table__
+    await session.exec(
+        update(books)
+        .where(books.c.id == book_id)
+        .values({
+            books.c.total_copies: books.c.total_copies + total,
+            books.c.available_copies: books.c.available_copies + available,
+        })
+    )
+
+
+async def adjust_availability_many(session: AsyncSession, available: Dict[int, int]) -> None:
+    """Apply per-book ``available`` deltas in one UPDATE; it walks the primary key, so books are locked in id order."""
+    available = {book_id: delta for book_id, delta in available.items() if delta}
+    if not available:
+        return
+    books = Book.__table__
+    await session.exec(
+        update(books)
+        .where(books.c.id.in_(available))
+        .values({books.c.available_copies: books.c.available_copies + case(available, value=books.c.id)})
+    )
+
+
+async def books_changed(session: AsyncSession, book_ids: Iterable[int]) -> Set[str]:
+    """
+    Stamp books whose copies or counters changed; returns the cache keys to invalidate once the
+    transaction commits. Only the book rows are stamped: author, category and publisher details
+    list book summaries without copies or counts (see versions.py), so checkouts of books that
+    share a parent never contend on the parent row.
+    """
+    book_ids = set(book_ids)
+    await touch_books(session, book_ids, parents=False)
+    return {book_key(book_id) for book_id in book_ids}
+
+
+async def copies_changed(session: AsyncSession, copies: Dict[int, int]) -> Set[str]:
+    """books_changed for the books of ``copies`` ({copy id: book id}), plus the keys of the copies."""
+    if not copies:
+        return set()
+    return {*(book_copy_key(copy_id) for copy_id in copies), *await books_changed(session, copies.values())}
+
+
+async def set_copy_status(session: AsyncSession, copy_id: int, current: BookCopyStatus,
+                          new: BookCopyStatus) -> Optional[int]:
+    """
+    Move a copy from ``current`` to ``new`` status and return its book id, or None if it was not in ``current``.
+    The conditional UPDATE takes the row lock itself: a concurrent transaction on the same copy waits,
+    re-evaluates the status once the first one commits and matches nothing.
+    """
+    result = await session.exec(
+        update(BookCopy)
+        .where(BookCopy.id == copy_id, BookCopy.status == current)
+        .values(status=new)
+        .returning(BookCopy.book_id)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
+async def reconcile_availability(session: AsyncSession, batch_size: int = None) -> List[int]:
+    """
+    Recount copies for every book, walking the primary key in batches and committing after each.
+    Returns the ids of books whose counters were wrong.
+    """
+    batch_size = batch_size or Config.AVAILABILITY_RECONCILE_BATCH_SIZE
+    books = Book.__table__
+    total = select(func.count(BookCopy.id)).where(BookCopy.book_id == books.c.id).scalar_subquery()
+    available = (
+        select(func.count(BookCopy.id))
+        .where(BookCopy.book_id == books.c.id, BookCopy.status == BookCopyStatus.AVAILABLE)
+        .scalar_subquery()
+    )
+
+    fixed = []
+    last_id = 0
+    while True:
+        result = await session.exec(select(Book.id).where(Book.id > last_id).order_by(Book.id).limit(batch_size))
+        ids = result.all()
+        if not ids:
+            return fixed
+        result = await session.exec(
+            update(books)
+            .where(books.c.id.in_(ids), or_(books.c.total_copies != total, books.c.available_copies != available))
+            .values({books.c.total_copies: total, books.c.available_copies: available})
+            .returning(books.c.id)
+        )
+        drifted = result.scalars().all()
+        stale_keys = await books_changed(session, drifted)
+        await session.commit()
+        await catalog_cache.invalidate(stale_keys)
+        fixed.extend(drifted)
+        last_id = ids[-1]
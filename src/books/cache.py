@@ -0,0 +1,89 @@
+from typing import Any, Awaitable, Callable, Iterable, Optional, Set, Type
+
+from fastapi import Request, Response
+from sqlmodel import select, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.cache import ResponseCache
+from src.config import Config
+from src.db.models import Book, BookAuthor, BookCategory
+from src.db.redis import redis_client
+from src.etags import is_conditional, not_modified, not_modified_response, row_validators
+
+catalog_cache = ResponseCache(redis_client, prefix="catalog:v2", ttl=Config.CATALOG_CACHE_TTL)
+
+
+def book_key(book_id: int) -> str:
+    return catalog_cache.key("book", book_id)
+
+
+def author_key(author_id: int) -> str:
+    return catalog_cache.key("author", author_id)
+
+
+def publisher_key(publisher_id: int) -> str:
+    return catalog_cache.key("publisher", publisher_id)
+
+
+def category_key(category_id: int) -> str:
+    return catalog_cache.key("category", category_id)
+
+
+def book_copy_key(book_copy_id: int) -> str:
+    return catalog_cache.key("book_copy", book_copy_id)
+
+
+async def book_dependent_keys(session: AsyncSession, book_ids: Iterable[int]) -> Set[str]:
+    """Keys of the books and of every author, category and publisher detail that embeds them."""
+    book_ids = list(book_ids)
+    if not book_ids:
+        return set()
+    keys = {book_key(book_id) for book_id in book_ids}
+    result = await session.exec(select(BookAuthor.author_id).where(BookAuthor.book_id.in_(book_ids)).distinct())
+    keys.update(author_key(author_id) for author_id in result.all())
+    result = await session.exec(
+        select(BookCategory.category_id).where(BookCategory.book_id.in_(book_ids)).distinct()
+    )
+    keys.update(category_key(category_id) for category_id in result.all())
+    result = await session.exec(
+        select(Book.publisher_id).where(Book.id.in_(book_ids), Book.publisher_id.is_not(None)).distinct()
+    )
+    keys.update(publisher_key(publisher_id) for publisher_id in result.all())
+    return keys
+
+
+# Changing an author, category or publisher moves updated_at of its books (see versions.py);
+# the other details listing those books show summaries without it and keep their entries.
+async def author_dependent_keys(session: AsyncSession, author_id: int) -> Set[str]:
+    result = await session.exec(select(BookAuthor.book_id).where(BookAuthor.author_id == author_id))
+    return {author_key(author_id), *(book_key(book_id) for book_id in result.all())}
+
+
+async def category_dependent_keys(session: AsyncSession, category_id: int) -> Set[str]:
+    result = await session.exec(select(BookCategory.book_id).where(BookCategory.category_id == category_id))
+    return {category_key(category_id), *(book_key(book_id) for book_id in result.all())}
+
+
+async def publisher_dependent_keys(session: AsyncSession, publisher_id: int) -> Set[str]:
+    result = await session.exec(select(Book.id).where(Book.publisher_id == publisher_id))
+    return {publisher_key(publisher_id), *(book_key(book_id) for book_id in result.all())}
+
+
+async def cached_detail(request: Request, session: AsyncSession, key: str, model: Type[SQLModel], obj_id: int,
+                        load: Callable[[], Awaitable[Any]], schema: Type[SQLModel]) -> Optional[Response]:
+    """
+    Detail response with ETag and Last-Modified, or None when the row does not exist.
+    Conditional requests are answered from the cached validators or ``SELECT id, updated_at``,
+    so a 304 never loads relationships or serializes the model.
+    """
+    if is_conditional(request):
+        headers = await catalog_cache.get_headers(key, "etag", "last-modified")
+        if headers is None:
+            result = await session.exec(select(model.id, model.updated_at).where(model.id == obj_id))
+            row = result.first()
+            if row is None:
+                return None
+            headers = row_validators(key, row.updated_at)
+        if not_modified(request, headers):
+            return not_modified_response(headers)
+    return await catalog_cache.read_through(key, load, schema, lambda obj: row_validators(key, obj.updated_at))
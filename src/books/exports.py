@@ -0,0 +1,105 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import func, select, exists
+
+from src.config import Config
+from src.db.main import async_session_maker
+from src.db.models import Author, Book, BookAuthor, BookCategory, Category, Publisher
+
+EXPORT_FIELDS = (
+    "id", "isbn", "title", "publication_date", "edition", "language", "description", "created_at", "updated_at",
+    "publisher", "authors", "categories", "total_copies", "available_copies",
+)
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _export_statement(publisher_id: Optional[int] = None, category_id: Optional[int] = None,
+                      updated_after: Optional[datetime] = None, updated_before: Optional[datetime] = None):
+    """One flat row per book; the nested data is aggregated by correlated subqueries on indexed keys."""
+    authors = (
+        select(func.array_agg(Author.first_name + " " + Author.last_name))
+        .join(BookAuthor, BookAuthor.author_id == Author.id)
+        .where(BookAuthor.book_id == Book.id)
+        .scalar_subquery()
+    )
+    categories = (
+        select(func.array_agg(Category.category_name))
+        .join(BookCategory, BookCategory.category_id == Category.id)
+        .where(BookCategory.book_id == Book.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            Book.id, Book.isbn, Book.title, Book.publication_date, Book.edition, Book.language, Book.description,
+            Book.created_at, Book.updated_at,
+            Publisher.name.label("publisher"),
+            authors.label("authors"),
+            categories.label("categories"),
+            Book.total_copies,
+            Book.available_copies,
+        )
+        .outerjoin(Publisher, Publisher.id == Book.publisher_id)
+        .order_by(Book.id)
+    )
+    if publisher_id is not None:
+        statement = statement.where(Book.publisher_id == publisher_id)
+    if category_id is not None:
+        statement = statement.where(
+            exists().where(BookCategory.book_id == Book.id, BookCategory.category_id == category_id)
+        )
+    if updated_after is not None:
+        statement = statement.where(Book.updated_at >= updated_after)
+    if updated_before is not None:
+        statement = statement.where(Book.updated_at < updated_before)
+    return statement
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _format_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({key: _json_value(value) for key, value in row._mapping.items()}) + "\n" for row in rows
+    )
+
+
+def _format_csv(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow(
+            "; ".join(value or []) if key in ("authors", "categories") else _json_value(value)
+            for key, value in row._mapping.items()
+        )
+    return buffer.getvalue()
+
+
+class BookExportService:
+    async def stream_books(self, fmt: str, batch_size: int = None, **filters) -> AsyncIterator[str]:
+        """
+        Yield the catalog as NDJSON or CSV text chunks of ``batch_size`` books.
+        Rows come from a server-side cursor, so memory use does not grow with the catalog.
+        The generator owns its session because it outlives the request's dependencies.
+        """
+        batch_size = batch_size or Config.EXPORT_BATCH_SIZE
+        statement = _export_statement(**filters).execution_options(yield_per=batch_size)
+
+        if fmt == "csv":
+            yield _format_csv([], header=True)
+        async with async_session_maker() as session:
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                yield _format_csv(rows) if fmt == "csv" else _format_ndjson(rows)
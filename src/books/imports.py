@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import column, select, table, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from .schemas import BookImportRowModel, BookImportReportModel, BookImportErrorModel
+from .versions import touch_books
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+STAGING_TABLE = "book_import_staging"
+STAGING_COLUMNS = (
+    "row_no", "isbn", "title", "publisher_id", "publication_date", "edition", "language", "description",
+    "author_ids", "category_ids",
+)
+
+CREATE_STAGING = f"""
+CREATE TEMPORARY TABLE {STAGING_TABLE} (
+    row_no integer PRIMARY KEY,
+    isbn varchar NOT NULL,
+    title varchar NOT NULL,
+    publisher_id integer NOT NULL,
+    publication_date date,
+    edition varchar,
+    language varchar NOT NULL,
+    description varchar,
+    author_ids integer[] NOT NULL,
+    category_ids integer[] NOT NULL,
+    book_id integer,
+    error varchar
+) ON COMMIT DROP
+"""
+
+# Each statement flags rows that fail one check; a row keeps the first error it gets.
+VALIDATIONS = (
+    f"""
+    UPDATE {STAGING_TABLE} s SET error = 'Publisher with ID ' || s.publisher_id || ' not found'
+    WHERE s.error IS NULL AND NOT EXISTS (SELECT 1 FROM publishers p WHERE p.id = s.publisher_id)
+    """,
+    f"""
+    UPDATE {STAGING_TABLE} s SET error = 'Author with ID ' || m.missing_id || ' not found'
+    FROM (
+        SELECT s2.row_no, min(ids.id) AS missing_id
+        FROM {STAGING_TABLE} s2 CROSS JOIN LATERAL unnest(s2.author_ids) AS ids(id)
+        WHERE NOT EXISTS (SELECT 1 FROM authors a WHERE a.id = ids.id)
+        GROUP BY s2.row_no
+    ) m
+    WHERE s.row_no = m.row_no AND s.error IS NULL
+    """,
+    f"""
+    UPDATE {STAGING_TABLE} s SET error = 'Category with ID ' || m.missing_id || ' not found'
+    FROM (
+        SELECT s2.row_no, min(ids.id) AS missing_id
+        FROM {STAGING_TABLE} s2 CROSS JOIN LATERAL unnest(s2.category_ids) AS ids(id)
+        WHERE NOT EXISTS (SELECT 1 FROM categories c WHERE c.id = ids.id)
+        GROUP BY s2.row_no
+    ) m
+    WHERE s.row_no = m.row_no AND s.error IS NULL
+    """,
+    # ON CONFLICT cannot touch the same row twice in one statement, so the last occurrence wins
+    f"""
+    UPDATE {STAGING_TABLE} s SET error = 'ISBN appears again later in the import'
+    FROM (
+        SELECT row_no, row_number() OVER (PARTITION BY isbn ORDER BY row_no DESC) AS occurrence
+        FROM {STAGING_TABLE} WHERE error IS NULL
+    ) d
+    WHERE s.row_no = d.row_no AND d.occurrence > 1
+    """,
+)
+
+MAP_EXISTING_BOOKS = f"""
+UPDATE {STAGING_TABLE} s SET book_id = b.id FROM books b WHERE b.isbn = s.isbn AND s.error IS NULL
+"""
+
+# search_vector is cleared so the batched backfill re-indexes imported books
+UPSERT_BOOKS = f"""
+WITH upserted AS (
+    INSERT INTO books (isbn, title, publisher_id, publication_date, edition, language, description,
+                       created_at, updated_at)
+    SELECT isbn, title, publisher_id, publication_date, edition, language, description,
+           LOCALTIMESTAMP, LOCALTIMESTAMP
+    FROM {STAGING_TABLE} WHERE error IS NULL
+    ON CONFLICT (isbn) DO UPDATE SET
+        title = EXCLUDED.title,
+        publisher_id = EXCLUDED.publisher_id,
+        publication_date = EXCLUDED.publication_date,
+        edition = EXCLUDED.edition,
+        language = EXCLUDED.language,
+        description = EXCLUDED.description,
+        updated_at = LOCALTIMESTAMP,
+        search_vector = NULL
+    RETURNING id, isbn, (xmax = 0) AS inserted
+), mapped AS (
+    UPDATE {STAGING_TABLE} s SET book_id = u.id FROM upserted u WHERE s.isbn = u.isbn AND s.error IS NULL
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+staging = table(STAGING_TABLE, column("book_id"), column("error"))
+STAGED_BOOKS = select(staging.c.book_id).where(staging.c.error.is_(None))
+
+SYNC_LINKS = (
+    f"""
+    DELETE FROM book_authors l USING {STAGING_TABLE} s
+    WHERE s.error IS NULL AND l.book_id = s.book_id AND NOT (l.author_id = ANY(s.author_ids))
+    """,
+    f"""
+    INSERT INTO book_authors (book_id, author_id)
+    SELECT s.book_id, unnest(s.author_ids) FROM {STAGING_TABLE} s WHERE s.error IS NULL
+    ON CONFLICT DO NOTHING
+    """,
+    f"""
+    DELETE FROM book_categories l USING {STAGING_TABLE} s
+    WHERE s.error IS NULL AND l.book_id = s.book_id AND NOT (l.category_id = ANY(s.category_ids))
+    """,
+    f"""
+    INSERT INTO book_categories (book_id, category_id)
+    SELECT s.book_id, unnest(s.category_ids) FROM {STAGING_TABLE} s WHERE s.error IS NULL
+    ON CONFLICT DO NOTHING
+    """,
+)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into text lines, keeping line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _iter_csv(lines: AsyncIterable[str]) -> AsyncIterator[dict]:
+    header = None
+    record = ""
+    async for line in lines:
+        record += line
+        # A quoted field may span lines; quotes are balanced once the record is complete
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        yield dict(zip(header, values))
+
+
+async def _iter_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[Optional[dict]]:
+    async for line in lines:
+        if line.strip():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = None
+            yield item if isinstance(item, dict) else None
+
+
+class BookImportService:
+    async def import_books(self, session: AsyncSession, lines: AsyncIterable[str], fmt: str,
+                           batch_size: int = None) -> BookImportReportModel:
+        """
+        Stream CSV/NDJSON rows into a temporary staging table with COPY, validate references
+        set-based, upsert books on ISBN and sync author/category links in bulk.
+        Everything runs in one transaction; invalid rows are skipped and reported.
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format {fmt}")
+        batch_size = batch_size or Config.IMPORT_COPY_BATCH_SIZE
+        rows = _iter_csv(lines) if fmt == "csv" else _iter_ndjson(lines)
+
+        await session.exec(text(CREATE_STAGING))
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        copy_records = raw_connection.driver_connection.copy_records_to_table
+
+        errors: List[BookImportErrorModel] = []
+        records = []
+        total = 0
+        async for item in rows:
+            total += 1
+            if item is None:
+                errors.append(BookImportErrorModel(row=total, error="Row is not a JSON object"))
+                continue
+            if fmt == "csv":
+                item = {key: value for key, value in item.items() if key and value not in ("", None)}
+            try:
+                row = BookImportRowModel.model_validate(item)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                isbn = item.get("isbn")
+                errors.append(BookImportErrorModel(row=total, isbn=str(isbn) if isbn is not None else None,
+                                                   error=f"{field}: {error['msg']}"))
+                continue
+            records.append((
+                total, row.isbn, row.title, row.publisher_id, row.publication_date, row.edition, row.language,
+                row.description, row.authors, row.categories,
+            ))
+            if len(records) >= batch_size:
+                await copy_records(STAGING_TABLE, records=records, columns=STAGING_COLUMNS)
+                records = []
+        if records:
+            await copy_records(STAGING_TABLE, records=records, columns=STAGING_COLUMNS)
+
+        await session.exec(text(f"ANALYZE {STAGING_TABLE}"))
+        for statement in VALIDATIONS:
+            await session.exec(text(statement))
+
+        # Stamp the publishers, authors and categories existing books are about to leave
+        await session.exec(text(MAP_EXISTING_BOOKS))
+        await touch_books(session, STAGED_BOOKS)
+        result = await session.exec(text(UPSERT_BOOKS))
+        inserted, updated = result.one()
+        for statement in SYNC_LINKS:
+            await session.exec(text(statement))
+        await touch_books(session, STAGED_BOOKS)
+
+        result = await session.exec(
+            text(f"SELECT row_no, isbn, error FROM {STAGING_TABLE} WHERE error IS NOT NULL")
+        )
+        errors.extend(BookImportErrorModel(row=row_no, isbn=isbn, error=error) for row_no, isbn, error in result)
+        await session.commit()
+
+        errors.sort(key=lambda error: error.row)
+        return BookImportReportModel(total=total, inserted=inserted, updated=updated, failed=len(errors),
+                                     errors=errors)
+
+
+async def _read_file(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+async def _main(path: str, fmt: str) -> BookImportReportModel:
+    from src.db.main import import_session_maker
+    from .cache import catalog_cache
+    from .search import backfill_search_vectors
+
+    async with import_session_maker() as session:
+        report = await BookImportService().import_books(session, iter_lines(_read_file(path)), fmt)
+        if report.inserted or report.updated:
+            await catalog_cache.clear()
+        await backfill_search_vectors(session)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import books from a CSV or NDJSON file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="defaults to the file extension")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    report = asyncio.run(_main(args.path, fmt))
+    print(report.model_dump_json(indent=2))
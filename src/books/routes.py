@@ -1,16 +1,30 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, Request
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.db.main import get_session
+from src.db.main import get_import_session, get_session
+from src.db.models import Author, Book, BookCopy, Category, Publisher
+from src.etags import not_modified, not_modified_response, page_validators, set_validators
+from src.pagination import set_next_cursor, NEXT_CURSOR_HEADER
+from src.celery_tasks import backfill_book_search_vectors
 from . import schemas
+from .cache import catalog_cache, cached_detail, book_key, author_key, publisher_key, category_key, book_copy_key
+from .exports import BookExportService, EXPORT_MEDIA_TYPES
+from .imports import BookImportService, iter_lines, IMPORT_FORMATS
 from .services import (
     BookService,
     AuthorService,
     PublisherService,
     CategoryService,
     BookCopyService,
+    BookSearchService,
+    BOOK_ORDER,
+    AUTHOR_ORDER,
+    PUBLISHER_ORDER,
+    CATEGORY_ORDER,
+    BOOK_COPY_ORDER,
 )
 from ..auth.dependencies import RoleChecker
 from ..db.enums import UserRole
@@ -20,6 +34,9 @@ book_router = APIRouter()
 # Book routes
 
 book_service = BookService()
+book_search_service = BookSearchService()
+book_import_service = BookImportService()
+book_export_service = BookExportService()
 admin_or_librarian_role_checker = RoleChecker([UserRole.ADMIN, UserRole.LIBRARIAN])
 
 
@@ -29,18 +46,88 @@ async def create_book(book: schemas.BookCreateModel, session: AsyncSession = Dep
     return await book_service.create_book(book, session)
 
 
+@book_router.post("/books/batch", response_model=List[schemas.BookResponseModel])
+async def create_books(batch: schemas.BookBatchCreateModel, session: AsyncSession = Depends(get_session),
+                       _: bool = Depends(admin_or_librarian_role_checker)):
+    return await book_service.create_books(batch.books, session)
+
+
+@book_router.patch("/books/batch", response_model=List[schemas.BookResponseModel])
+async def update_books(batch: schemas.BookBatchUpdateModel, session: AsyncSession = Depends(get_session),
+                       _: bool = Depends(admin_or_librarian_role_checker)):
+    books = {book.id: book for book in batch.books}
+    if len(books) != len(batch.books):
+        raise ValueError("Duplicate book ID in request")
+    return await book_service.update_books(books, session)
+
+
+@book_router.post("/books/import", response_model=schemas.BookImportReportModel)
+async def import_books(request: Request, fmt: Optional[str] = Query(None, alias="format"),
+                       session: AsyncSession = Depends(get_import_session),
+                       _: bool = Depends(admin_or_librarian_role_checker)):
+    """
+    Bulk import/upsert books from a streamed CSV or NDJSON request body.
+    The format is taken from ``?format=`` or the Content-Type header.
+    """
+    content_type = request.headers.get("content-type", "")
+    fmt = fmt or ("ndjson" if "ndjson" in content_type or "jsonl" in content_type else "csv")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format {fmt}")
+    report = await book_import_service.import_books(session, iter_lines(request.stream()), fmt)
+    if report.inserted or report.updated:
+        await catalog_cache.clear()
+        backfill_book_search_vectors.delay()
+    return report
+
+
+@book_router.get("/books/export")
+async def export_books(export_params: Annotated[schemas.BookExportParams, Query()],
+                       _: bool = Depends(admin_or_librarian_role_checker)):
+    """
+    Stream the whole (filtered) catalog as NDJSON or CSV with authors, categories,
+    publisher and copy counts flattened into each row.
+    """
+    filters = export_params.model_dump(exclude={"format"})
+    fmt = export_params.format
+    return StreamingResponse(
+        book_export_service.stream_books(fmt, **filters),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="books.{fmt}"'},
+    )
+
+
+@book_router.get("/books/search", response_model=List[schemas.BookResponseModel])
+async def search_books(search_params: Annotated[schemas.BookSearchParams, Query()], response: Response,
+                       session: AsyncSession = Depends(get_session)):
+    books, next_cursor = await book_search_service.search_books(session, **search_params.model_dump())
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return books
+
+
 @book_router.get("/books/{book_id}", response_model=schemas.BookResponseModel)
-async def get_book(book_id: int, session: AsyncSession = Depends(get_session)):
-    book = await book_service.get_book_by_id(book_id, session)
-    if not book:
+async def get_book(book_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    response = await cached_detail(
+        request, session, book_key(book_id), Book, book_id,
+        lambda: book_service.get_book_by_id(book_id, session), schemas.BookResponseModel,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return book
+    return response
 
 
 @book_router.get("/books/", response_model=List[schemas.BookResponseModel])
-async def get_books(filter_params: Annotated[schemas.BookFilterParams, Query()], session: AsyncSession = Depends(get_session)):
+async def get_books(filter_params: Annotated[schemas.BookFilterParams, Query()], request: Request,
+                    response: Response, session: AsyncSession = Depends(get_session)):
     params = filter_params.model_dump()
-    return await book_service.get_books(session, **params)
+    if "if-none-match" in request.headers:
+        headers = page_validators("books", await book_service.get_books(session, **params, validators_only=True))
+        if not_modified(request, headers, use_last_modified=False):
+            return not_modified_response(headers)
+    books = await book_service.get_books(session, **params)
+    set_next_cursor(response, books, BOOK_ORDER, filter_params.limit)
+    set_validators(response, page_validators("books", books))
+    return books
 
 
 @book_router.put("/books/{book_id}", response_model=schemas.BookResponseModel)
@@ -73,16 +160,28 @@ async def create_author(author: schemas.AuthorCreateModel, session: AsyncSession
 
 
 @book_router.get("/authors/{author_id}", response_model=schemas.AuthorResponseModel)
-async def get_author(author_id: int, session: AsyncSession = Depends(get_session)):
-    author = await author_service.get_author_by_id(author_id, session)
-    if not author:
+async def get_author(author_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    response = await cached_detail(
+        request, session, author_key(author_id), Author, author_id,
+        lambda: author_service.get_author_by_id(author_id, session), schemas.AuthorResponseModel,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Author not found")
-    return author
+    return response
 
 
 @book_router.get("/authors/", response_model=List[schemas.AuthorResponseModel])
-async def get_authors(skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session)):
-    return await author_service.get_authors(session, skip, limit)
+async def get_authors(request: Request, response: Response, skip: int = 0, limit: int = 10,
+                      after: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    if "if-none-match" in request.headers:
+        page = await author_service.get_authors(session, skip, limit, after, validators_only=True)
+        headers = page_validators("authors", page)
+        if not_modified(request, headers, use_last_modified=False):
+            return not_modified_response(headers)
+    authors = await author_service.get_authors(session, skip, limit, after)
+    set_next_cursor(response, authors, AUTHOR_ORDER, limit)
+    set_validators(response, page_validators("authors", authors))
+    return authors
 
 
 @book_router.put("/authors/{author_id}", response_model=schemas.AuthorResponseModel)
@@ -116,16 +215,28 @@ async def create_publisher(publisher: schemas.PublisherCreateModel, session: Asy
 
 
 @book_router.get("/publishers/{publisher_id}", response_model=schemas.PublisherResponseModel)
-async def get_publisher(publisher_id: int, session: AsyncSession = Depends(get_session)):
-    publisher = await publisher_service.get_publisher_by_id(publisher_id, session)
-    if not publisher:
+async def get_publisher(publisher_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    response = await cached_detail(
+        request, session, publisher_key(publisher_id), Publisher, publisher_id,
+        lambda: publisher_service.get_publisher_by_id(publisher_id, session), schemas.PublisherResponseModel,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Publisher not found")
-    return publisher
+    return response
 
 
 @book_router.get("/publishers/", response_model=List[schemas.PublisherResponseModel])
-async def get_publishers(skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session)):
-    return await publisher_service.get_publishers(session, skip, limit)
+async def get_publishers(request: Request, response: Response, skip: int = 0, limit: int = 10,
+                         after: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    if "if-none-match" in request.headers:
+        page = await publisher_service.get_publishers(session, skip, limit, after, validators_only=True)
+        headers = page_validators("publishers", page)
+        if not_modified(request, headers, use_last_modified=False):
+            return not_modified_response(headers)
+    publishers = await publisher_service.get_publishers(session, skip, limit, after)
+    set_next_cursor(response, publishers, PUBLISHER_ORDER, limit)
+    set_validators(response, page_validators("publishers", publishers))
+    return publishers
 
 
 @book_router.put("/publishers/{publisher_id}", response_model=schemas.PublisherResponseModel)
@@ -159,16 +270,28 @@ async def create_category(category: schemas.CategoryCreateModel, session: AsyncS
 
 
 @book_router.get("/categories/{category_id}", response_model=schemas.CategoryResponseModel)
-async def get_category(category_id: int, session: AsyncSession = Depends(get_session)):
-    category = await category_service.get_category_by_id(category_id, session)
-    if not category:
+async def get_category(category_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    response = await cached_detail(
+        request, session, category_key(category_id), Category, category_id,
+        lambda: category_service.get_category_by_id(category_id, session), schemas.CategoryResponseModel,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    return response
 
 
 @book_router.get("/categories/", response_model=List[schemas.CategoryResponseModel])
-async def get_categories(skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session)):
-    return await category_service.get_categories(session, skip, limit)
+async def get_categories(request: Request, response: Response, skip: int = 0, limit: int = 10,
+                         after: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    if "if-none-match" in request.headers:
+        page = await category_service.get_categories(session, skip, limit, after, validators_only=True)
+        headers = page_validators("categories", page)
+        if not_modified(request, headers, use_last_modified=False):
+            return not_modified_response(headers)
+    categories = await category_service.get_categories(session, skip, limit, after)
+    set_next_cursor(response, categories, CATEGORY_ORDER, limit)
+    set_validators(response, page_validators("categories", categories))
+    return categories
 
 
 @book_router.put("/categories/{category_id}", response_model=schemas.CategoryResponseModel)
@@ -200,16 +323,28 @@ async def create_book_copy(book_copy: schemas.BookCopyCreateModel, session: Asyn
 
 
 @book_router.get("/book_copies/{book_copy_id}", response_model=schemas.BookCopyResponseModel)
-async def get_book_copy(book_copy_id: int, session: AsyncSession = Depends(get_session)):
-    book_copy = await book_copy_service.get_book_copy_by_id(book_copy_id, session)
-    if not book_copy:
+async def get_book_copy(book_copy_id: int, request: Request, session: AsyncSession = Depends(get_session)):
+    response = await cached_detail(
+        request, session, book_copy_key(book_copy_id), BookCopy, book_copy_id,
+        lambda: book_copy_service.get_book_copy_by_id(book_copy_id, session), schemas.BookCopyResponseModel,
+    )
+    if response is None:
         raise HTTPException(status_code=404, detail="Book copy not found")
-    return book_copy
+    return response
 
 
 @book_router.get("/book_copies/", response_model=List[schemas.BookCopyResponseModel])
-async def get_book_copies(skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_session)):
-    return await book_copy_service.get_book_copies(session, skip, limit)
+async def get_book_copies(request: Request, response: Response, skip: int = 0, limit: int = 10,
+                          after: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    if "if-none-match" in request.headers:
+        page = await book_copy_service.get_book_copies(session, skip, limit, after, validators_only=True)
+        headers = page_validators("book_copies", page)
+        if not_modified(request, headers, use_last_modified=False):
+            return not_modified_response(headers)
+    book_copies = await book_copy_service.get_book_copies(session, skip, limit, after)
+    set_next_cursor(response, book_copies, BOOK_COPY_ORDER, limit)
+    set_validators(response, page_validators("book_copies", book_copies))
+    return book_copies
 
 
 @book_router.put("/book_copies/{book_copy_id}", response_model=schemas.BookCopyResponseModel)
@@ -228,3 +363,8 @@ async def delete_book_copy(book_copy_id: int, session: AsyncSession = Depends(ge
     if not deleted_book_copy:
         raise HTTPException(status_code=404, detail="Book copy not found")
     return deleted_book_copy
+
+
+@book_router.get("/catalog/cache-stats")
+async def get_catalog_cache_stats(_: bool = Depends(admin_or_librarian_role_checker)):
+    return await catalog_cache.stats()
@@ -1,8 +1,10 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, date
+from typing import Optional, List, Literal
 
+from pydantic import Field, field_validator
 from sqlmodel import SQLModel
 
+from src.config import Config
 from src.db.enums import BookCopyStatus
 from src.filters import FilterParams
 
@@ -69,14 +71,26 @@ class BookModel(SQLModel):
     isbn: str
     title: str
     publisher_id: int
-    publication_date: datetime
-    edition: str
+    publication_date: Optional[datetime]
+    edition: Optional[str]
     language: str
     description: Optional[str]
     created_at: datetime
     updated_at: datetime
 
 
+class BookSummaryModel(SQLModel):
+    """A book as listed in author, publisher and category details: no timestamps or copy counts."""
+    id: int
+    isbn: str
+    title: str
+    publisher_id: int
+    publication_date: Optional[datetime]
+    edition: Optional[str]
+    language: str
+    description: Optional[str]
+
+
 class BookCreateModel(SQLModel):
     isbn: str
     title: str
@@ -101,6 +115,18 @@ class BookUpdateModel(SQLModel):
     description: Optional[str] = None
 
 
+class BookBatchCreateModel(SQLModel):
+    books: List[BookCreateModel] = Field(min_length=1, max_length=Config.BOOK_BATCH_MAX_SIZE)
+
+
+class BookBatchUpdateItemModel(BookUpdateModel):
+    id: int
+
+
+class BookBatchUpdateModel(SQLModel):
+    books: List[BookBatchUpdateItemModel] = Field(min_length=1, max_length=Config.BOOK_BATCH_MAX_SIZE)
+
+
 class BookCopyModel(SQLModel):
     id: int
     book_id: int
@@ -143,18 +169,20 @@ class BookCopyResponseModel(SQLModel):
 
 
 class AuthorResponseModel(AuthorModel):
-    books: List[BookModel]
+    books: List[BookSummaryModel]
 
 
 class PublisherResponseModel(PublisherModel):
-    books: List[BookModel]
+    books: List[BookSummaryModel]
 
 
 class CategoryResponseModel(CategoryModel):
-    books: List[BookModel]
+    books: List[BookSummaryModel]
 
 
 class BookResponseModel(BookModel):
+    total_copies: int
+    available_copies: int
     authors: List[AuthorModel]
     publisher: PublisherModel
     categories: List[CategoryModel]
@@ -164,3 +192,57 @@ class BookResponseModel(BookModel):
 class BookFilterParams(FilterParams):
     publisher_id: Optional[int] = None
     title: Optional[str] = None
+    available: Optional[bool] = None
+
+
+class BookExportParams(SQLModel):
+    format: Literal["ndjson", "csv"] = "ndjson"
+    publisher_id: Optional[int] = None
+    category_id: Optional[int] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+
+
+class BookSearchParams(FilterParams):
+    q: str = Field(min_length=1, max_length=200)
+
+
+class BookImportRowModel(SQLModel):
+    isbn: str = Field(min_length=1)
+    title: str = Field(min_length=1)
+    publisher_id: int
+    publication_date: Optional[date] = None
+    edition: Optional[str] = None
+    language: str = "English"
+    description: Optional[str] = None
+    authors: List[int] = []
+    categories: List[int] = []
+
+    @field_validator("publication_date", mode="before")
+    @classmethod
+    def parse_publication_date(cls, value):
+        if isinstance(value, str):
+            return datetime.fromisoformat(value).date() if value else None
+        return value
+
+    @field_validator("authors", "categories", mode="before")
+    @classmethod
+    def split_ids(cls, value):
+        # CSV columns carry id lists as "1;2;3"
+        if isinstance(value, str):
+            return [item for item in value.replace(",", ";").split(";") if item.strip()]
+        return value if value is not None else []
+
+
+class BookImportErrorModel(SQLModel):
+    row: int
+    isbn: Optional[str] = None
+    error: str
+
+
+class BookImportReportModel(SQLModel):
+    total: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[BookImportErrorModel]
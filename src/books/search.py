@@ -0,0 +1,75 @@
+from typing import Iterable, Union
+
+from sqlalchemy import func, literal_column, update, Select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.models import Author, Book, BookAuthor, BookCategory, Category
+
+search_vector = Book.__table__.c.search_vector
+
+
+def _search_document():
+    """tsvector for a row of ``books``: title > author names > category names > description."""
+    author_names = (
+        select(func.string_agg(Author.first_name + " " + Author.last_name, " "))
+        .join(BookAuthor, BookAuthor.author_id == Author.id)
+        .where(BookAuthor.book_id == Book.id)
+        .scalar_subquery()
+    )
+    category_names = (
+        select(func.string_agg(Category.category_name, " "))
+        .join(BookCategory, BookCategory.category_id == Category.id)
+        .where(BookCategory.book_id == Book.id)
+        .scalar_subquery()
+    )
+    config = Config.SEARCH_TEXT_CONFIG
+    return (
+        func.setweight(func.to_tsvector(config, func.coalesce(Book.title, "")), literal_column("'A'"))
+        .op("||")(func.setweight(func.to_tsvector("simple", func.coalesce(author_names, "")), literal_column("'B'")))
+        .op("||")(func.setweight(func.to_tsvector(config, func.coalesce(category_names, "")), literal_column("'C'")))
+        .op("||")(func.setweight(func.to_tsvector(config, func.coalesce(Book.description, "")), literal_column("'D'")))
+    )
+
+
+async def refresh_search_vectors(session: AsyncSession, book_ids: Union[Iterable[int], Select]) -> None:
+    """
+    Recompute search_vector for the given books (a list of ids or a select of ids).
+    Runs in the caller's transaction and leaves updated_at untouched.
+    """
+    if not isinstance(book_ids, Select):
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+    books = Book.__table__
+    statement = (
+        update(books)
+        .where(books.c.id.in_(book_ids))
+        .values({books.c.search_vector: _search_document(), books.c.updated_at: books.c.updated_at})
+    )
+    await session.exec(statement)
+
+
+async def backfill_search_vectors(session: AsyncSession, batch_size: int = None) -> int:
+    """
+    Index books whose search_vector is still NULL, walking the primary key in batches
+    and committing after each one so no batch holds row locks for long.
+    """
+    batch_size = batch_size or Config.SEARCH_BACKFILL_BATCH_SIZE
+    last_id = 0
+    total = 0
+    while True:
+        result = await session.exec(
+            select(Book.id)
+            .where(Book.id > last_id, search_vector.is_(None))
+            .order_by(Book.id)
+            .limit(batch_size)
+        )
+        ids = result.all()
+        if not ids:
+            return total
+        await refresh_search_vectors(session, ids)
+        await session.commit()
+        total += len(ids)
+        last_id = ids[-1]
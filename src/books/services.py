@@ -1,8 +1,13 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from sqlalchemy import or_, and_, func, delete, tuple_
+from sqlalchemy.orm import selectinload, joinedload
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.config import Config
+from src.errors import BookNotFound
+from src.pagination import paginate, encode_cursor, decode_cursor
 from src.db.models import (
     Author,
     Publisher,
@@ -24,13 +29,50 @@ from .schemas import (
     BookCopyCreateModel,
     BookCopyUpdateModel,
 )
+from .cache import (
+    catalog_cache,
+    book_copy_key,
+    book_dependent_keys,
+    author_dependent_keys,
+    category_dependent_keys,
+    publisher_dependent_keys,
+)
+from .availability import adjust_availability, books_changed, copies_changed, copy_counts
+from .search import refresh_search_vectors, search_vector
+from .versions import touch_books
+
+
+# Loader options matching the nested response models. Relationships are lazy by default,
+# so every query that feeds a response model has to ask for exactly what it serializes.
+BOOK_RESPONSE_OPTIONS = (
+    joinedload(Book.publisher),
+    selectinload(Book.authors),
+    selectinload(Book.categories),
+    selectinload(Book.book_copies),
+)
+
+# Keyset orderings; each ends in the primary key so that cursors are unambiguous.
+BOOK_ORDER = (Book.title, Book.id)
+AUTHOR_ORDER = (Author.id,)
+PUBLISHER_ORDER = (Publisher.id,)
+CATEGORY_ORDER = (Category.id,)
+BOOK_COPY_ORDER = (BookCopy.id,)
 
 
 class BookService:
     async def get_book_by_id(self, book_id: int, session: AsyncSession):
-        book = await session.exec(select(Book).where(Book.id == book_id))
+        book = await session.exec(
+            select(Book)
+            .where(Book.id == book_id)
+            .options(*BOOK_RESPONSE_OPTIONS)
+            .execution_options(populate_existing=True)
+        )
         return book.first()
 
+    async def book_exists(self, book_id: int, session: AsyncSession) -> bool:
+        result = await session.exec(select(Book.id).where(Book.id == book_id))
+        return result.first() is not None
+
     async def get_book_by_isbn(self, isbn: str, session: AsyncSession):
         book = await session.exec(select(Book).where(Book.isbn == isbn))
         return book.first()
@@ -40,19 +82,33 @@ class BookService:
         return book.first()
 
     async def get_books(self, session: AsyncSession, publisher_id: Optional[int] = None,
-                        title: Optional[str] = None, offset: int = 0, limit: int = 10):
-        statement = select(Book)
+                        title: Optional[str] = None, available: Optional[bool] = None, offset: int = 0,
+                        limit: int = 10, after: Optional[str] = None, validators_only: bool = False):
+        """``validators_only`` returns just (id, updated_at) rows of the page for conditional requests."""
+        if validators_only:
+            statement = select(Book.id, Book.updated_at)
+        else:
+            statement = select(Book).options(*BOOK_RESPONSE_OPTIONS)
         if publisher_id:
             statement = statement.where(Book.publisher_id == publisher_id)
         if title:
             statement = statement.where(Book.title == title)
+        if available is not None:
+            # available=true is served by the partial index ix_books_available_title_id
+            statement = statement.where(Book.available_copies > 0 if available else Book.available_copies == 0)
 
-        statement = statement.offset(offset).limit(limit)
+        statement = paginate(statement, BOOK_ORDER, limit, offset=offset, after=after)
         books = await session.exec(statement)
         return books.all()
 
     async def get_books_by_publisher(self, publisher_id: int, session: AsyncSession, skip: int = 0, limit: int = 10):
-        books = await session.exec(select(Book).where(Book.publisher_id == publisher_id).offset(skip).limit(limit))
+        books = await session.exec(
+            select(Book)
+                .where(Book.publisher_id == publisher_id)
+                .options(*BOOK_RESPONSE_OPTIONS)
+                .offset(skip)
+                .limit(limit)
+        )
         return books.all()
 
     async def get_books_by_category(self, category_id: int, session: AsyncSession, skip: int = 0, limit: int = 10):
@@ -60,6 +116,7 @@ class BookService:
             select(Book)
                 .join(BookCategory)
                 .where(BookCategory.category_id == category_id)
+                .options(*BOOK_RESPONSE_OPTIONS)
                 .offset(skip)
                 .limit(limit)
         )
@@ -71,6 +128,7 @@ class BookService:
             select(Book)
                 .join(BookAuthor)
                 .where(BookAuthor.author_id == author_id)
+                .options(*BOOK_RESPONSE_OPTIONS)
                 .offset(skip)
                 .limit(limit)
         )
@@ -78,118 +136,219 @@ class BookService:
         return books.all()
 
     async def create_book(self, book: BookCreateModel, session: AsyncSession):
-        db_book = await self.get_book_by_isbn(book.isbn, session)
-        if db_book:
-            raise ValueError("Book with this ISBN already exists")
-        book_data_dict = book.model_dump()
-        authors = book_data_dict.pop("authors", None)
-        categories = book_data_dict.pop("categories", None)
-        publisher_id = book_data_dict.get("publisher_id")
-        if publisher_id is not None:
-            publisher = await PublisherService().get_publisher_by_id(publisher_id, session)
-            if publisher is None:
-                raise ValueError(f"Publisher with ID {publisher_id} not found")
-
-        new_book = Book(**book_data_dict)
-        session.add(new_book)
-        await session.flush()
-
-        # Process authors
-        await self._add_authors_to_book(new_book, authors, session)
+        books = await self.create_books([book], session)
+        return books[0]
+
+    async def create_books(self, books: List[BookCreateModel], session: AsyncSession) -> List[Book]:
+        """Create several books in one transaction, validating all references up front."""
+        await self._validate_isbns(session, [book.isbn for book in books])
+        await self._validate_references(
+            session,
+            publisher_ids=[book.publisher_id for book in books],
+            author_ids=[author_id for book in books for author_id in book.authors],
+            category_ids=[category_id for book in books for category_id in book.categories],
+        )
 
-        # Process categories
-        await self._add_categories_to_book(new_book, categories, session)
+        new_books = [Book(**book.model_dump(exclude={"authors", "categories"})) for book in books]
+        session.add_all(new_books)
+        await session.flush()
 
+        book_ids = [new_book.id for new_book in new_books]
+        await self._sync_links(session, BookAuthor, "author_id",
+                               {new_book.id: book.authors for new_book, book in zip(new_books, books)})
+        await self._sync_links(session, BookCategory, "category_id",
+                               {new_book.id: book.categories for new_book, book in zip(new_books, books)})
+        await session.flush()
+        await refresh_search_vectors(session, book_ids)
+        await touch_books(session, book_ids)
+        stale_keys = await book_dependent_keys(session, book_ids)
         await session.commit()
-        await session.refresh(new_book)
-        return new_book
-
-    async def _add_authors_to_book(self, book: Book, author_ids: List[int], session: AsyncSession) -> None:
-        """Add authors to the book based on the provided IDs."""
-        # Validate all authors exist
-        for author_id in author_ids:
-            result = await session.exec(select(Author).where(Author.id == author_id))
-
-            author = result.first()
-            if not author:
-                await session.rollback()
-                raise ValueError(f"Author with ID {author_id} not found")
-
-            # Create the link
-            book_author_link = BookAuthor(book_id=book.id, author_id=author_id)
-            session.add(book_author_link)
-
-    async def _add_categories_to_book(self, book: Book, category_ids: List[int], session: AsyncSession) -> None:
-        """Add categories to the book based on the provided IDs."""
-        # Validate all categories exist
-        for category_id in category_ids:
-            result = await session.exec(select(Category).where(Category.id == category_id))
-            category = result.first()
-            if not category:
-                await session.rollback()
-                raise ValueError(f"Category with ID {category_id} not found")
-
-            # Create the link
-            book_category_link = BookCategory(book_id=book.id, category_id=category_id)
-            session.add(book_category_link)
+        await catalog_cache.invalidate(stale_keys)
+        return await self._get_books_by_ids(book_ids, session)
 
     async def update_book(self, book_id: int, book: BookUpdateModel, session: AsyncSession):
-        db_book: Book = await self.get_book_by_id(book_id, session)
-        if not db_book:
-            raise ValueError("Book not found")
-        book_data = book.model_dump(exclude_unset=True)
-        authors = book_data.pop("authors", None)
-        categories = book_data.pop("categories", None)
-        publisher_id = book_data.get("publisher_id")
-        if publisher_id is not None:
-            publisher = await PublisherService().get_publisher_by_id(publisher_id, session)
-            if publisher is None:
-                raise ValueError(f"Publisher with ID {publisher_id} not found")
-
-        for key, value in book_data.items():
-            setattr(db_book, key, value)
-
-        from sqlalchemy import delete
-
-        # Clear existing relationships
-        await session.exec(delete(BookAuthor).where(BookAuthor.book_id == book_id))
-        await session.exec(delete(BookCategory).where(BookCategory.book_id == book_id))
-        if authors:
-            # Add new relationships
-            await self._add_authors_to_book(db_book, authors, session)
-        if categories:
-            await self._add_categories_to_book(db_book, categories, session)
+        books = await self.update_books({book_id: book}, session)
+        return books[0]
+
+    async def update_books(self, books: Dict[int, BookUpdateModel], session: AsyncSession) -> List[Book]:
+        """
+        Apply partial updates to several books in one transaction.
+        Author/category links are only touched for books that send those lists, and then by diff.
+        """
+        book_ids = list(books)
+        result = await session.exec(select(Book).where(Book.id.in_(book_ids)))
+        db_books = {db_book.id: db_book for db_book in result.all()}
+        if any(book_id not in db_books for book_id in book_ids):
+            raise BookNotFound()
+        # A changed ISBN must be free, also of the other books in the batch: the rows are updated one by one
+        await self._validate_isbns(session, [book.isbn for book_id, book in books.items()
+                                             if book.isbn is not None and book.isbn != db_books[book_id].isbn])
+        # Details embedding these books before the change; the ones after are added below
+        stale_keys = await book_dependent_keys(session, book_ids)
+        await touch_books(session, book_ids)
+
+        updates, authors, categories = {}, {}, {}
+        for book_id, book in books.items():
+            data = book.model_dump(exclude_unset=True, exclude={"id"})
+            book_authors = data.pop("authors", None)
+            book_categories = data.pop("categories", None)
+            if book_authors is not None:
+                authors[book_id] = book_authors
+            if book_categories is not None:
+                categories[book_id] = book_categories
+            updates[book_id] = data
+
+        await self._validate_references(
+            session,
+            publisher_ids=[data["publisher_id"] for data in updates.values() if data.get("publisher_id") is not None],
+            author_ids=[author_id for ids in authors.values() for author_id in ids],
+            category_ids=[category_id for ids in categories.values() for category_id in ids],
+        )
+
+        for book_id, data in updates.items():
+            for key, value in data.items():
+                setattr(db_books[book_id], key, value)
 
+        await self._sync_links(session, BookAuthor, "author_id", authors)
+        await self._sync_links(session, BookCategory, "category_id", categories)
+        await session.flush()
+        await refresh_search_vectors(session, book_ids)
+        await touch_books(session, book_ids)
+        stale_keys |= await book_dependent_keys(session, book_ids)
         await session.commit()
-        await session.refresh(db_book)
-        return db_book
+        await catalog_cache.invalidate(stale_keys)
+        return await self._get_books_by_ids(book_ids, session)
+
+    async def _get_books_by_ids(self, book_ids: List[int], session: AsyncSession) -> List[Book]:
+        """Load books for the response, in the order of ``book_ids``."""
+        result = await session.exec(
+            select(Book)
+            .where(Book.id.in_(book_ids))
+            .options(*BOOK_RESPONSE_OPTIONS)
+            .execution_options(populate_existing=True)
+        )
+        books = {book.id: book for book in result.all()}
+        return [books[book_id] for book_id in book_ids]
+
+    async def _validate_isbns(self, session: AsyncSession, isbns: List[str]) -> None:
+        """Reject ISBNs repeated in ``isbns`` or already used by a book, with one lookup."""
+        if not isbns:
+            return
+        if len(set(isbns)) != len(isbns):
+            raise ValueError("Duplicate ISBN in request")
+        result = await session.exec(select(Book.isbn).where(Book.isbn.in_(isbns)))
+        existing = result.first()
+        if existing:
+            raise ValueError(f"Book with ISBN {existing} already exists")
+
+    async def _validate_references(self, session: AsyncSession, publisher_ids: List[int] = (),
+                                   author_ids: List[int] = (), category_ids: List[int] = ()) -> None:
+        """Check referenced ids with one IN query per entity type."""
+        for model, ids in ((Publisher, publisher_ids), (Author, author_ids), (Category, category_ids)):
+            ids = set(ids)
+            if not ids:
+                continue
+            result = await session.exec(select(model.id).where(model.id.in_(ids)))
+            missing = ids - set(result.all())
+            if missing:
+                raise ValueError(f"{model.__name__} with ID {min(missing)} not found")
+
+    async def _sync_links(self, session: AsyncSession, link_model, column: str,
+                          wanted: Dict[int, List[int]]) -> None:
+        """Make the link rows for each book match ``wanted``: insert missing ones, delete removed ones."""
+        if not wanted:
+            return
+        result = await session.exec(
+            select(link_model.book_id, getattr(link_model, column)).where(link_model.book_id.in_(wanted))
+        )
+        current = set(result.all())
+        wanted_links = {(book_id, other_id) for book_id, ids in wanted.items() for other_id in ids}
+
+        removed = current - wanted_links
+        if removed:
+            await session.exec(
+                delete(link_model)
+                .where(tuple_(link_model.book_id, getattr(link_model, column)).in_(removed))
+                .execution_options(synchronize_session=False)
+            )
+        session.add_all(link_model(**{"book_id": book_id, column: other_id})
+                        for book_id, other_id in wanted_links - current)
 
     async def delete_book(self, book_id: int, session: AsyncSession):
         db_book = await self.get_book_by_id(book_id, session)
         if not db_book:
             raise ValueError("Book not found")
 
+        stale_keys = await book_dependent_keys(session, [book_id])
+        await touch_books(session, [book_id])
         await session.delete(db_book)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return db_book
 
 
+class BookSearchService:
+    async def search_books(self, session: AsyncSession, q: str, limit: int = 10, offset: int = 0,
+                           after: Optional[str] = None):
+        """
+        Rank books by full-text match plus title trigram similarity.
+        Returns ``(books, next_cursor)``; the cursor encodes ``(score, id)`` of the last row.
+        """
+        query = func.websearch_to_tsquery(Config.SEARCH_TEXT_CONFIG, q)
+        # Books not yet backfilled have a NULL vector but can still match on title similarity
+        rank = func.coalesce(func.ts_rank_cd(search_vector, query), 0)
+        score = (rank + func.similarity(Book.title, q)).label("score")
+
+        statement = (
+            select(Book, score)
+            .where(or_(search_vector.op("@@")(query), Book.title.op("%")(q)))
+            .options(*BOOK_RESPONSE_OPTIONS)
+            .order_by(score.desc(), Book.id)
+        )
+        if after:
+            last_score, last_id = decode_cursor(after, (score, Book.id))
+            if not isinstance(last_score, (int, float)):
+                raise ValueError("Invalid pagination cursor")
+            statement = statement.where(or_(score < last_score, and_(score == last_score, Book.id > last_id)))
+        elif offset:
+            statement = statement.offset(offset)
+
+        result = await session.exec(statement.limit(limit))
+        rows = result.all()
+        books = [book for book, _ in rows]
+        next_cursor = None
+        if rows and len(rows) == limit:
+            last_book, last_score = rows[-1]
+            next_cursor = encode_cursor([last_score, last_book.id])
+        return books, next_cursor
+
+
 class AuthorService:
 
     async def get_author_by_id(self, author_id: int, session: AsyncSession):
-        author = await session.exec(select(Author).where(Author.id == author_id))
+        author = await session.exec(
+            select(Author)
+            .where(Author.id == author_id)
+            .options(selectinload(Author.books))
+            .execution_options(populate_existing=True)
+        )
         return author.first()
 
-    async def get_authors(self, session: AsyncSession, skip: int = 0, limit: int = 10):
-        authors = await session.exec(select(Author).offset(skip).limit(limit))
+    async def get_authors(self, session: AsyncSession, skip: int = 0, limit: int = 10, after: Optional[str] = None,
+                          validators_only: bool = False):
+        if validators_only:
+            statement = select(Author.id, Author.updated_at)
+        else:
+            statement = select(Author).options(selectinload(Author.books))
+        statement = paginate(statement, AUTHOR_ORDER, limit, offset=skip, after=after)
+        authors = await session.exec(statement)
         return authors.all()
 
     async def create_author(self, author: AuthorCreateModel, session: AsyncSession):
         new_author = Author(**author.model_dump())
         session.add(new_author)
         await session.commit()
-        await session.refresh(new_author)
-        return new_author
+        return await self.get_author_by_id(new_author.id, session)
 
     async def update_author(self, author_id: int, author: AuthorUpdateModel, session: AsyncSession):
         db_author = await self.get_author_by_id(author_id, session)
@@ -200,34 +359,56 @@ class AuthorService:
             setattr(db_author, key, value)
 
         session.add(db_author)
+        await session.flush()
+        author_books = select(BookAuthor.book_id).where(BookAuthor.author_id == author_id)
+        await refresh_search_vectors(session, author_books)
+        await touch_books(session, author_books, parents=False)
+        stale_keys = await author_dependent_keys(session, author_id)
         await session.commit()
-        await session.refresh(db_author)
+        await catalog_cache.invalidate(stale_keys)
         return db_author
 
     async def delete_author(self, author_id: int, session: AsyncSession):
         db_author = await self.get_author_by_id(author_id, session)
         if not db_author:
             return None
+        stale_keys = await author_dependent_keys(session, author_id)
+        await touch_books(session, select(BookAuthor.book_id).where(BookAuthor.author_id == author_id), parents=False)
         await session.delete(db_author)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return db_author
 
 
 class PublisherService:
     async def get_publisher_by_id(self, publisher_id: int, session: AsyncSession):
-        publisher = await session.exec(select(Publisher).where(Publisher.id == publisher_id))
+        publisher = await session.exec(
+            select(Publisher)
+            .where(Publisher.id == publisher_id)
+            .options(selectinload(Publisher.books))
+            .execution_options(populate_existing=True)
+        )
         return publisher.first()
 
-    async def get_publishers(self, session: AsyncSession, skip: int = 0, limit: int = 10):
-        publishers = await session.exec(select(Publisher).offset(skip).limit(limit))
+    async def publisher_exists(self, publisher_id: int, session: AsyncSession) -> bool:
+        result = await session.exec(select(Publisher.id).where(Publisher.id == publisher_id))
+        return result.first() is not None
+
+    async def get_publishers(self, session: AsyncSession, skip: int = 0, limit: int = 10,
+                             after: Optional[str] = None, validators_only: bool = False):
+        if validators_only:
+            statement = select(Publisher.id, Publisher.updated_at)
+        else:
+            statement = select(Publisher).options(selectinload(Publisher.books))
+        statement = paginate(statement, PUBLISHER_ORDER, limit, offset=skip, after=after)
+        publishers = await session.exec(statement)
         return publishers.all()
 
     async def create_publisher(self, publisher: PublisherCreateModel, session: AsyncSession):
         new_publisher = Publisher(**publisher.model_dump())
         session.add(new_publisher)
         await session.commit()
-        await session.refresh(new_publisher)
-        return new_publisher
+        return await self.get_publisher_by_id(new_publisher.id, session)
 
     async def update_publisher(self, publisher_id: int, publisher: PublisherUpdateModel, session: AsyncSession):
         db_publisher = await self.get_publisher_by_id(publisher_id, session)
@@ -236,30 +417,46 @@ class PublisherService:
         for key, value in publisher.model_dump(exclude_unset=True).items():
             setattr(db_publisher, key, value)
         session.add(db_publisher)
+        await touch_books(session, select(Book.id).where(Book.publisher_id == publisher_id), parents=False)
+        stale_keys = await publisher_dependent_keys(session, publisher_id)
         await session.commit()
-        await session.refresh(db_publisher)
+        await catalog_cache.invalidate(stale_keys)
         return db_publisher
 
     async def delete_publisher(self, publisher_id: int, session: AsyncSession):
         db_publisher = await self.get_publisher_by_id(publisher_id, session)
         if not db_publisher:
             return None
+        stale_keys = await publisher_dependent_keys(session, publisher_id)
+        await touch_books(session, select(Book.id).where(Book.publisher_id == publisher_id), parents=False)
         await session.delete(db_publisher)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return db_publisher
 
 
 class CategoryService:
     async def get_category_by_id(self, category_id: int, session: AsyncSession):
-        category = await session.exec(select(Category).where(Category.id == category_id))
+        category = await session.exec(
+            select(Category)
+            .where(Category.id == category_id)
+            .options(selectinload(Category.books))
+            .execution_options(populate_existing=True)
+        )
         return category.first()
 
     async def get_category_by_name(self, category_name: str, session: AsyncSession):
         category = await session.exec(select(Category).where(Category.category_name == category_name))
         return category.first()
 
-    async def get_categories(self, session: AsyncSession, skip: int = 0, limit: int = 10):
-        categories = await session.exec(select(Category).offset(skip).limit(limit))
+    async def get_categories(self, session: AsyncSession, skip: int = 0, limit: int = 10,
+                             after: Optional[str] = None, validators_only: bool = False):
+        if validators_only:
+            statement = select(Category.id, Category.updated_at)
+        else:
+            statement = select(Category).options(selectinload(Category.books))
+        statement = paginate(statement, CATEGORY_ORDER, limit, offset=skip, after=after)
+        categories = await session.exec(statement)
         return categories.all()
 
     async def create_category(self, category: CategoryCreateModel, session: AsyncSession):
@@ -270,8 +467,7 @@ class CategoryService:
         new_category = Category(**category.model_dump())
         session.add(new_category)
         await session.commit()
-        await session.refresh(new_category)
-        return new_category
+        return await self.get_category_by_id(new_category.id, session)
 
     async def update_category(self, category_id: int, category: CategoryUpdateModel, session: AsyncSession):
         db_category = await self.get_category_by_id(category_id, session)
@@ -281,66 +477,98 @@ class CategoryService:
         for key, value in category.model_dump(exclude_unset=True).items():
             setattr(db_category, key, value)
         session.add(db_category)
+        await session.flush()
+        category_books = select(BookCategory.book_id).where(BookCategory.category_id == category_id)
+        await refresh_search_vectors(session, category_books)
+        await touch_books(session, category_books, parents=False)
+        stale_keys = await category_dependent_keys(session, category_id)
         await session.commit()
-        await session.refresh(db_category)
+        await catalog_cache.invalidate(stale_keys)
         return db_category
 
     async def delete_category(self, category_id: int, session: AsyncSession):
         db_category = await self.get_category_by_id(category_id, session)
         if not db_category:
             return None
+        stale_keys = await category_dependent_keys(session, category_id)
+        await touch_books(session, select(BookCategory.book_id).where(BookCategory.category_id == category_id),
+                          parents=False)
         await session.delete(db_category)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return db_category
 
 
 class BookCopyService:
-    async def get_book_copy_by_id(self, book_copy_id: int, session: AsyncSession):
-        book_copy = await session.exec(select(BookCopy).where(BookCopy.id == book_copy_id))
+    async def get_book_copy_by_id(self, book_copy_id: int, session: AsyncSession, for_update: bool = False):
+        """``for_update`` locks the row so the status it reports stays current until commit."""
+        statement = select(BookCopy).where(BookCopy.id == book_copy_id)
+        if for_update:
+            statement = statement.with_for_update().execution_options(populate_existing=True)
+        book_copy = await session.exec(statement)
         return book_copy.first()
 
     async def get_book_copy_by_copy_number(self, copy_number: str, session: AsyncSession):
         book_copy = await session.exec(select(BookCopy).where(BookCopy.copy_number == copy_number))
         return book_copy.first()
 
-    async def get_book_copies(self, session: AsyncSession, skip: int = 0, limit: int = 10):
-        book_copies = await session.exec(select(BookCopy).offset(skip).limit(limit))
+    async def get_book_copies(self, session: AsyncSession, skip: int = 0, limit: int = 10,
+                              after: Optional[str] = None, validators_only: bool = False):
+        statement = select(BookCopy.id, BookCopy.updated_at) if validators_only else select(BookCopy)
+        statement = paginate(statement, BOOK_COPY_ORDER, limit, offset=skip, after=after)
+        book_copies = await session.exec(statement)
         return book_copies.all()
 
     async def create_book_copy(self, book_copy: BookCopyCreateModel, session: AsyncSession):
-        book_id = book_copy.get("book_id")
-        book = await BookService().get_book_by_id(book_id, session)
-        if book is None:
+        book_id = book_copy.book_id
+        if not await BookService().book_exists(book_id, session):
             raise ValueError(f"Book with id {book_id} does not exist.")
         new_book_copy = BookCopy(**book_copy.model_dump())
         session.add(new_book_copy)
+        total, available = copy_counts(new_book_copy.status)
+        await adjust_availability(session, book_id, total, available)
+        stale_keys = await books_changed(session, [book_id])
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         await session.refresh(new_book_copy)
         return new_book_copy
 
     async def update_book_copy(self, book_copy_id: int, book_copy: BookCopyUpdateModel, session: AsyncSession):
         book_copy = book_copy.model_dump(exclude_unset=True)
         book_id = book_copy.get("book_id")
-        book = await BookService().get_book_by_id(book_id, session)
-        if book is None:
+        if book_id is not None and not await BookService().book_exists(book_id, session):
             raise ValueError(f"Book with id {book_id} does not exist.")
-        db_book_copy = await self.get_book_copy_by_id(book_copy_id, session)
+        db_book_copy = await self.get_book_copy_by_id(book_copy_id, session, for_update=True)
         if not db_book_copy:
             raise ValueError("Book copy not found")
 
+        old_book_id, (old_total, old_available) = db_book_copy.book_id, copy_counts(db_book_copy.status)
         for key, value in book_copy.items():
             setattr(db_book_copy, key, value)
+        new_total, new_available = copy_counts(db_book_copy.status)
+        book_ids = {old_book_id, db_book_copy.book_id}
 
         session.add(db_book_copy)
+        if db_book_copy.book_id == old_book_id:
+            await adjust_availability(session, old_book_id, available=new_available - old_available)
+        else:
+            await adjust_availability(session, old_book_id, -old_total, -old_available)
+            await adjust_availability(session, db_book_copy.book_id, new_total, new_available)
+        stale_keys = {book_copy_key(book_copy_id), *await books_changed(session, book_ids)}
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         await session.refresh(db_book_copy)
         return db_book_copy
 
     async def delete_book_copy(self, book_copy_id: int, session: AsyncSession):
-        db_book_copy = await self.get_book_copy_by_id(book_copy_id, session)
+        db_book_copy = await self.get_book_copy_by_id(book_copy_id, session, for_update=True)
         if not db_book_copy:
             raise ValueError("Book copy not found")
 
+        total, available = copy_counts(db_book_copy.status)
+        await adjust_availability(session, db_book_copy.book_id, -total, -available)
+        stale_keys = await copies_changed(session, {book_copy_id: db_book_copy.book_id})
         await session.delete(db_book_copy)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return db_book_copy
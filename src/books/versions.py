@@ -0,0 +1,42 @@
+"""
+``updated_at`` on catalog rows tracks the last change to the row's API representation, so
+conditional GETs can be answered from that column alone. Detail models embed related rows
+(a book lists its copies, authors, categories and publisher; an author lists its books), so
+a change has to be stamped on every row whose representation shows it. Author, category and
+publisher details list books as ``BookSummaryModel``, which leaves out ``updated_at`` and the
+copy counts: only changes to a book's own catalog fields reach them.
+"""
+from datetime import datetime
+from typing import Iterable, Union
+
+from sqlalchemy import update, Select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db.models import Author, Book, BookAuthor, BookCategory, Category, Publisher
+
+
+async def touch_books(session: AsyncSession, book_ids: Union[Iterable[int], Select], parents: bool = True) -> None:
+    """
+    Stamp books and, with ``parents``, the authors, categories and publishers that list them.
+    Call it before a change to reach the old relations and after it to reach the new ones.
+    Changes the book summaries don't show (copies, counts, related rows) pass ``parents=False``.
+    """
+    if not isinstance(book_ids, Select):
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+    now = datetime.now()
+    statements = [update(Book).where(Book.id.in_(book_ids))]
+    if parents:
+        statements += [
+            update(Author).where(
+                Author.id.in_(select(BookAuthor.author_id).where(BookAuthor.book_id.in_(book_ids)))
+            ),
+            update(Category).where(
+                Category.id.in_(select(BookCategory.category_id).where(BookCategory.book_id.in_(book_ids)))
+            ),
+            update(Publisher).where(Publisher.id.in_(select(Book.publisher_id).where(Book.id.in_(book_ids)))),
+        ]
+    for statement in statements:
+        await session.exec(statement.values(updated_at=now).execution_options(synchronize_session=False))
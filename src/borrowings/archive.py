@@ -0,0 +1,104 @@
+"""
+Returned and lost borrowings are moved from ``borrowings`` to ``borrowings_archive`` once they
+have been closed for ``BORROWING_ARCHIVE_AFTER_DAYS``, so the hot table and its indexes hold
+little more than open loans. Reads of a borrowing or of borrowing lists go through
+``borrowing_by_id`` / ``borrowings_page``, which look at both tables.
+"""
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import delete, func, insert, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.enums import BorrowingStatus
+from src.db.models import Borrowing, BorrowingArchive
+from src.pagination import paginate
+
+CLOSED_STATUSES = (BorrowingStatus.RETURNED, BorrowingStatus.LOST)
+BORROWING_COLUMNS = (
+    "id", "copy_id", "user_id", "borrowed_date", "due_date", "returned_date", "extended_times", "status", "notes",
+    "accepted_by",
+)
+
+
+def closed_at():
+    # Lost borrowings, and returns recorded without a date, count as closed at their due date
+    return func.coalesce(Borrowing.returned_date, Borrowing.due_date)
+
+
+async def archive_batch(session: AsyncSession, days: int = None, batch_size: int = None) -> int:
+    """
+    Move up to ``batch_size`` borrowings closed more than ``days`` ago to the archive and commit.
+    Delete and insert are one statement, so a batch holds its row locks only for that statement;
+    SKIP LOCKED passes over rows being changed, which the next run picks up.
+    Returns the number of rows moved; 0 means the pass is done.
+    """
+    days = days or Config.BORROWING_ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or Config.BORROWING_ARCHIVE_BATCH_SIZE
+    candidates = (
+        select(Borrowing.id)
+        .where(Borrowing.status.in_(CLOSED_STATUSES), closed_at() < datetime.now() - timedelta(days=days))
+        .order_by(closed_at())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(Borrowing)
+        .where(Borrowing.id.in_(candidates.scalar_subquery()))
+        .returning(*(getattr(Borrowing, name) for name in BORROWING_COLUMNS))
+        .cte("moved")
+    )
+    result = await session.exec(
+        insert(BorrowingArchive)
+        .from_select(BORROWING_COLUMNS, select(*(moved.c[name] for name in BORROWING_COLUMNS)))
+        .add_cte(moved)
+        .returning(BorrowingArchive.id)
+    )
+    count = len(result.all())
+    await session.commit()
+    return count
+
+
+async def borrowing_by_id(session: AsyncSession, borrowing_id: int):
+    """The borrowing, or its archived row (read-only) if it has been archived."""
+    borrowing = await session.get(Borrowing, borrowing_id)
+    if borrowing is None:
+        borrowing = await session.get(BorrowingArchive, borrowing_id)
+    return borrowing
+
+
+def _filtered(model, filters: dict):
+    statement = select(*(getattr(model, name) for name in BORROWING_COLUMNS))
+    for name, value in filters.items():
+        if value is not None:
+            statement = statement.where(getattr(model, name) == value)
+    return statement
+
+
+async def borrowings_page(session: AsyncSession, order_by: Sequence, limit: int, offset: int = 0,
+                          after: Optional[str] = None, status: Optional[BorrowingStatus] = None, **filters):
+    """
+    A page of borrowings from both tables; ``order_by`` are ``Borrowing`` columns.
+    Each table is paginated on its own index first, so the union never holds more than
+    ``offset + limit`` rows per table. The archive is skipped when ``status`` is an open one.
+    As in ``paginate``, ``offset`` is ignored when a cursor is given.
+    """
+    if after:
+        offset = 0
+    filters["status"] = status
+    hot = _filtered(Borrowing, filters)
+    if status is not None and status not in CLOSED_STATUSES:
+        result = await session.exec(paginate(hot, order_by, limit, offset=offset, after=after))
+        return result.all()
+
+    names = [column.key for column in order_by]
+    archived = _filtered(BorrowingArchive, filters)
+    union = union_all(
+        paginate(hot, order_by, offset + limit, after=after).subquery().select(),
+        paginate(archived, [getattr(BorrowingArchive, name) for name in names], offset + limit,
+                 after=after).subquery().select(),
+    ).subquery()
+    result = await session.exec(paginate(union.select(), [union.c[name] for name in names], limit, offset=offset))
+    return result.all()
@@ -0,0 +1,103 @@
+"""
+Per-patron loan quotas. ``users.active_loans`` counts a patron's borrowings that are neither
+returned nor lost; like the copy counters in src.books.availability it is adjusted with relative
+updates in the transaction that opens or closes a loan. Opening loans is a conditional UPDATE
+against the limit of the patron's role, so the check and the increment are one primary-key
+statement. ``reconcile_loan_counts`` recounts from ``borrowings`` and repairs drift.
+Lock order: the user row is taken after the borrowing, copy and book rows.
+"""
+from typing import Dict, List
+
+from sqlalchemy import case, func, or_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.db.enums import BorrowingStatus, UserRole
+from src.db.models import Borrowing, User
+from .archive import CLOSED_STATUSES
+from ..errors import ExtensionLimitReached, LoanLimitReached
+
+
+def is_open(status: BorrowingStatus) -> bool:
+    return status not in CLOSED_STATUSES
+
+
+def _limit(limits: Dict[str, int], role: UserRole) -> int:
+    # Roles without an entry get the patron limit
+    return limits.get(UserRole(role).value, limits[UserRole.USER.value])
+
+
+def _role_limit(limits: Dict[str, int], role):
+    return case(*((role == member, _limit(limits, member)) for member in UserRole))
+
+
+def check_extensions(borrower: User, extended_times: int) -> None:
+    if extended_times > _limit(Config.EXTENSION_LIMITS, borrower.role):
+        raise ExtensionLimitReached()
+
+
+async def take_loans(session: AsyncSession, user_id: int, count: int = 1) -> None:
+    """Count ``count`` new open loans against the patron, or raise LoanLimitReached if that exceeds their limit."""
+    users = User.__table__
+    result = await session.exec(
+        update(users)
+        .where(users.c.id == user_id, users.c.active_loans + count <= _role_limit(Config.LOAN_LIMITS, users.c.role))
+        .values({users.c.active_loans: users.c.active_loans + count, users.c.updated_at: users.c.updated_at})
+        .returning(users.c.id)
+    )
+    if result.first() is None:
+        raise LoanLimitReached()
+
+
+async def release_loans(session: AsyncSession, counts: Dict[int, int]) -> None:
+    """Take ``counts[user_id]`` closed loans off each patron's counter."""
+    counts = {user_id: count for user_id, count in counts.items() if count}
+    if not counts:
+        return
+    users = User.__table__
+    await session.exec(
+        update(users)
+        .where(users.c.id.in_(counts))
+        .values({users.c.active_loans: users.c.active_loans - case(counts, value=users.c.id),
+                 users.c.updated_at: users.c.updated_at})
+    )
+
+
+async def loans_left(session: AsyncSession, user_id: int) -> int:
+    users = User.__table__
+    result = await session.exec(
+        select(_role_limit(Config.LOAN_LIMITS, users.c.role) - users.c.active_loans).where(users.c.id == user_id)
+    )
+    return max(result.first() or 0, 0)
+
+
+async def reconcile_loan_counts(session: AsyncSession, batch_size: int = None) -> List[int]:
+    """
+    Recount open borrowings for every user, walking the primary key in batches and committing after each.
+    Returns the ids of users whose counters were wrong.
+    """
+    batch_size = batch_size or Config.LOAN_RECONCILE_BATCH_SIZE
+    users = User.__table__
+    open_loans = (
+        select(func.count(Borrowing.id))
+        .where(Borrowing.user_id == users.c.id, Borrowing.status.notin_(CLOSED_STATUSES))
+        .scalar_subquery()
+    )
+
+    fixed = []
+    last_id = 0
+    while True:
+        result = await session.exec(select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size))
+        ids = result.all()
+        if not ids:
+            return fixed
+        result = await session.exec(
+            update(users)
+            .where(users.c.id.in_(ids), users.c.active_loans != open_loans)
+            .values({users.c.active_loans: open_loans, users.c.updated_at: users.c.updated_at})
+            .returning(users.c.id)
+        )
+        fixed.extend(result.scalars().all())
+        await session.commit()
+        last_id = ids[-1]
@@ -3,15 +3,17 @@
 from typing import List, Annotated
 
 # Borrow accept, manage by librarian
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.db.main import get_session
+from src.filters import FilterParams
+from src.pagination import set_next_cursor
 from . import schemas
-from .services import BorrowService
+from .services import BorrowService, BORROWING_ORDER, HISTORY_ORDER
 from ..auth.dependencies import get_current_user, RoleChecker
 from ..db.enums import UserRole
-from ..db.models import User
+from ..auth.principal import UserPrincipal
 
 router = APIRouter()
 
@@ -22,15 +24,55 @@ admin_or_librarian_role_checker = RoleChecker([UserRole.ADMIN, UserRole.LIBRARIA
 # Borrowing routes
 @router.post("/", response_model=schemas.BorrowingModel)
 async def create_borrowing(borrowing: schemas.BorrowingCreateModel, session: AsyncSession = Depends(get_session),
-                           current_user: User = Depends(get_current_user)):
+                           current_user: UserPrincipal = Depends(get_current_user)):
     borrowing.user_id = current_user.id
     borrow = await borrow_service.create_borrowing(session, borrowing)
     return borrow
 
 
+@router.post("/by-book/{book_id}", response_model=schemas.BorrowingModel)
+async def borrow_book(book_id: int, borrowing: schemas.BorrowingByBookCreateModel,
+                      session: AsyncSession = Depends(get_session),
+                      current_user: UserPrincipal = Depends(get_current_user)):
+    return await borrow_service.borrow_book(session, book_id, borrowing, current_user.id)
+
+
+@router.post("/bulk-checkout", response_model=List[schemas.BulkItemResultModel])
+async def bulk_checkout(data: schemas.BulkCheckoutModel, session: AsyncSession = Depends(get_session),
+                        current_user: UserPrincipal = Depends(get_current_user),
+                        _: bool = Depends(admin_or_librarian_role_checker)):
+    return await borrow_service.bulk_checkout(session, data, current_user)
+
+
+@router.post("/bulk-return", response_model=List[schemas.BulkItemResultModel])
+async def bulk_return(data: schemas.BulkReturnModel, session: AsyncSession = Depends(get_session),
+                      current_user: UserPrincipal = Depends(get_current_user),
+                      _: bool = Depends(admin_or_librarian_role_checker)):
+    return await borrow_service.bulk_return(session, data.copy_numbers, current_user)
+
+
+@router.get("/users/{user_id}/history", response_model=List[schemas.BorrowingHistoryModel])
+async def read_user_history(user_id: int, filter_params: Annotated[FilterParams, Query()], response: Response,
+                            session: AsyncSession = Depends(get_session),
+                            current_user: UserPrincipal = Depends(get_current_user)):
+    events = await borrow_service.get_user_history(session, user_id, current_user, **filter_params.model_dump())
+    set_next_cursor(response, events, HISTORY_ORDER, filter_params.limit)
+    return events
+
+
+@router.get("/{borrowing_id}/history", response_model=List[schemas.BorrowingHistoryModel])
+async def read_borrowing_history(borrowing_id: int, filter_params: Annotated[FilterParams, Query()],
+                                 response: Response, session: AsyncSession = Depends(get_session),
+                                 current_user: UserPrincipal = Depends(get_current_user)):
+    events = await borrow_service.get_borrowing_history(session, borrowing_id, current_user,
+                                                         **filter_params.model_dump())
+    set_next_cursor(response, events, HISTORY_ORDER, filter_params.limit)
+    return events
+
+
 @router.get("/{borrowing_id}", response_model=schemas.BorrowResponseModel)
 async def read_borrowing(borrowing_id: int, session: AsyncSession = Depends(get_session),
-                         current_user: User = Depends(get_current_user)):
+                         current_user: UserPrincipal = Depends(get_current_user)):
     borrowing = await borrow_service.get_borrowing(session, borrowing_id, user=current_user)
     if not borrowing:
         raise HTTPException(status_code=404, detail="Borrowing not found")
@@ -40,17 +82,20 @@ async def read_borrowing(borrowing_id: int, session: AsyncSession = Depends(get_
 @router.get("/", response_model=List[schemas.BorrowResponseModel])
 async def read_borrowings(
         filter_params: Annotated[schemas.BorrowingFilterParams, Query()],
+        response: Response,
         session: AsyncSession = Depends(get_session),
-        current_user: User = Depends(get_current_user)
+        current_user: UserPrincipal = Depends(get_current_user)
 ):
     filters = filter_params.model_dump()
-    return await borrow_service.get_borrowings(session, user=current_user, **filters)
+    borrowings = await borrow_service.get_borrowings(session, user=current_user, **filters)
+    set_next_cursor(response, borrowings, BORROWING_ORDER, filter_params.limit)
+    return borrowings
 
 
 @router.put("/{borrowing_id}", response_model=schemas.BorrowResponseModel)
 async def update_borrowing(borrowing_id: int, borrowing: schemas.BorrowingUpdateModel,
                            session: AsyncSession = Depends(get_session),
-                           current_user: User = Depends(get_current_user)):
+                           current_user: UserPrincipal = Depends(get_current_user)):
     updated_borrowing = await borrow_service.update_borrowing(session, borrowing_id, borrowing, user=current_user)
     if not updated_borrowing:
         raise HTTPException(status_code=404, detail="Borrowing not found")
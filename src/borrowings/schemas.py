@@ -1,8 +1,9 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import List, Optional
 
-from sqlmodel import SQLModel
+from sqlmodel import Field, SQLModel
 
+from src.config import Config
 from src.filters import FilterParams
 from src.db.enums import BorrowingStatus
 from src.books.schemas import BookCopyModel
@@ -28,6 +29,34 @@ class BorrowingCreateModel(SQLModel):
     notes: Optional[str]
 
 
+class BorrowingByBookCreateModel(SQLModel):
+    due_date: date
+    location: Optional[str] = None
+    notes: Optional[str] = None
+
+
+class HoldClaimModel(SQLModel):
+    due_date: date
+    notes: Optional[str] = None
+
+
+class BulkCheckoutModel(SQLModel):
+    user_id: int
+    due_date: date
+    copy_numbers: List[str] = Field(min_length=1, max_length=Config.CIRCULATION_BATCH_MAX_SIZE)
+    notes: Optional[str] = None
+
+
+class BulkReturnModel(SQLModel):
+    copy_numbers: List[str] = Field(min_length=1, max_length=Config.CIRCULATION_BATCH_MAX_SIZE)
+
+
+class BulkItemResultModel(SQLModel):
+    copy_number: str
+    borrowing_id: Optional[int] = None
+    error: Optional[str] = None  # copy_not_found, copy_not_available or copy_not_borrowed
+
+
 class UserBorrowingModel(SQLModel):
     email: str
     first_name: str
@@ -46,8 +75,10 @@ class BorrowingUpdateModel(SQLModel):
 class BorrowingHistoryModel(SQLModel):
     id: int
     borrowing_id: int
+    user_id: int
     status: BorrowingStatus
     changed_at: datetime
+    changed_by: Optional[int]
     notes: Optional[str]
 
 
@@ -1,30 +1,344 @@
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 
+from sqlalchemy import case, exists, insert, update
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.db.enums import BorrowingStatus
-from src.db.models import Borrowing, User, BookCopy
-from .schemas import BorrowingCreateModel, BorrowingUpdateModel
-from ..errors import InsufficientPermission
+from src.books.availability import adjust_availability, adjust_availability_many, copies_changed, set_copy_status
+from src.books.cache import catalog_cache
+from src.config import Config
+from src.db.enums import BookCopyStatus, BorrowingStatus, HoldStatus
+from src.db.models import Book, BookCopy, Borrowing, BorrowingEvent, User
+from src.holds.services import HoldService, release_copy, release_copies
+from src.pagination import paginate
+from .archive import CLOSED_STATUSES, borrowing_by_id, borrowings_page
+from .quotas import check_extensions, is_open, loans_left, release_loans, take_loans
+from .schemas import (
+    BorrowingByBookCreateModel, BorrowingCreateModel, BorrowingUpdateModel, BulkCheckoutModel, HoldClaimModel,
+)
+from ..errors import BookNotFound, CopyNotAvailable, InsufficientPermission, UserNotFound
+
+
+BORROWING_ORDER = (Borrowing.borrowed_date, Borrowing.id)
+HISTORY_ORDER = (BorrowingEvent.changed_at, BorrowingEvent.id)
+# Statuses a borrowing can be created in; both count as open loans
+NEW_BORROWING_STATUSES = (BorrowingStatus.REQUESTED, BorrowingStatus.ACTIVE)
+# What patrons may change on their own borrowings; status and return dates are for librarians
+PATRON_BORROWING_FIELDS = {"due_date", "notes"}
+
+
+def record_event(session: AsyncSession, borrowing: Borrowing, changed_by: Optional[int] = None,
+                 notes: Optional[str] = None) -> None:
+    """Append the borrowing's current status to its history, in the caller's transaction."""
+    session.add(BorrowingEvent(borrowing_id=borrowing.id, user_id=borrowing.user_id, status=borrowing.status,
+                               changed_by=changed_by, notes=notes))
+
+
+async def record_events(session: AsyncSession, borrowings: Iterable[Tuple[int, int]], status: BorrowingStatus,
+                        changed_by: Optional[int] = None, notes: Optional[str] = None) -> None:
+    """Set-based record_event for (borrowing id, user id) pairs that all moved to ``status``."""
+    now = datetime.now()
+    params = [
+        {"borrowing_id": borrowing_id, "user_id": user_id, "status": status, "changed_at": now,
+         "changed_by": changed_by, "notes": notes}
+        for borrowing_id, user_id in borrowings
+    ]
+    if params:
+        await session.exec(insert(BorrowingEvent), params=params)
+
+
+async def checkout_copy(session: AsyncSession, copy_id: int) -> int:
+    book_id = await set_copy_status(session, copy_id, BookCopyStatus.AVAILABLE, BookCopyStatus.BORROWED)
+    if book_id is None:
+        if await session.get(BookCopy, copy_id) is None:
+            raise ValueError("Book copy not found")
+        raise CopyNotAvailable()
+    return book_id
+
+
+async def checkout_any_copy(session: AsyncSession, book_id: int, location: Optional[str] = None) -> int:
+    """
+    Check out any available copy of a book, preferring ``location``, and return its id.
+    Candidates come from the partial index on available copies; SKIP LOCKED passes over copies
+    another checkout is claiming, so concurrent requests for one title each get a different copy.
+    """
+    statement = select(BookCopy.id).where(
+        BookCopy.book_id == book_id, BookCopy.status == BookCopyStatus.AVAILABLE
+    )
+    if location is not None:
+        statement = statement.order_by((BookCopy.location == location).desc(), BookCopy.id)
+    result = await session.exec(statement.limit(1).with_for_update(skip_locked=True))
+    copy_id = result.first()
+    if copy_id is None:
+        if not (await session.exec(select(exists().where(Book.id == book_id)))).one():
+            raise BookNotFound()
+        raise CopyNotAvailable()
+    await set_copy_status(session, copy_id, BookCopyStatus.AVAILABLE, BookCopyStatus.BORROWED)
+    return copy_id
+
+
+async def mark_overdue_batch(session: AsyncSession, batch_size: int = None) -> List[int]:
+    """
+    Flip up to ``batch_size`` active borrowings past their due date to overdue and commit.
+    The candidates are read from the partial index ix_borrowings_active_due_date; SKIP LOCKED passes
+    over rows a patron or librarian is changing, which the next run picks up.
+    Returns the ids that changed; an empty list means the sweep is done.
+    """
+    batch_size = batch_size or Config.OVERDUE_SWEEP_BATCH_SIZE
+    due = (
+        select(Borrowing.id)
+        .where(Borrowing.status == BorrowingStatus.ACTIVE, Borrowing.due_date < datetime.now())
+        .order_by(Borrowing.due_date)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.exec(
+        update(Borrowing)
+        .where(Borrowing.id.in_(due.scalar_subquery()))
+        .values(status=BorrowingStatus.OVERDUE)
+        .returning(Borrowing.id, Borrowing.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    rows = result.all()
+    await record_events(session, rows, BorrowingStatus.OVERDUE, notes="Past due date")
+    await session.commit()
+    return [borrowing_id for borrowing_id, _ in rows]
+
+
+async def overdue_notices(session: AsyncSession, borrowing_ids: List[int]):
+    """(email, first name, title, due date) of each borrowing, ordered by patron."""
+    result = await session.exec(
+        select(User.email, User.first_name, Book.title, Borrowing.due_date)
+        .join(User, User.id == Borrowing.user_id)
+        .join(BookCopy, BookCopy.id == Borrowing.copy_id)
+        .join(Book, Book.id == BookCopy.book_id)
+        .where(Borrowing.id.in_(borrowing_ids))
+        .order_by(User.email, Borrowing.due_date)
+    )
+    return result.all()
+
+
+async def due_soon_digests(session: AsyncSession, days: int = None) -> AsyncIterator[dict]:
+    """
+    Yield one reminder digest per patron with active borrowings due between now and the end of
+    the day ``days`` from today that have not been reminded of yet; see mark_reminded.
+    The window is a range scan of ix_borrowings_active_due_date; rows are streamed from a
+    server-side cursor in patron order, so memory holds one digest at a time.
+    """
+    days = Config.REMINDER_DAYS_AHEAD if days is None else days
+    statement = (
+        select(User.id, User.email, User.first_name, Book.title, Borrowing.id.label("borrowing_id"),
+               Borrowing.due_date)
+        .join(User, User.id == Borrowing.user_id)
+        .join(BookCopy, BookCopy.id == Borrowing.copy_id)
+        .join(Book, Book.id == BookCopy.book_id)
+        .where(
+            Borrowing.status == BorrowingStatus.ACTIVE,
+            Borrowing.due_date >= datetime.now(),
+            Borrowing.due_date < datetime.combine(date.today() + timedelta(days=days + 1), time.min),
+            Borrowing.reminded_at.is_(None),
+        )
+        .order_by(User.id, Borrowing.due_date)
+        .execution_options(yield_per=Config.REMINDER_FETCH_SIZE)
+    )
+    digest = None
+    result = await session.stream(statement)
+    async for row in result:
+        if digest is None or digest["user_id"] != row.id:
+            if digest is not None:
+                yield digest
+            digest = {"user_id": row.id, "email": row.email, "first_name": row.first_name, "books": [],
+                      "borrowing_ids": []}
+        digest["books"].append({"title": row.title, "due_date": f"{row.due_date:%Y-%m-%d}"})
+        digest["borrowing_ids"].append(row.borrowing_id)
+    if digest is not None:
+        yield digest
+
+
+async def mark_reminded(session: AsyncSession, borrowing_ids: Iterable[int]) -> None:
+    """Record that reminders for ``borrowing_ids`` were queued, so later runs skip them, and commit."""
+    await session.exec(
+        update(Borrowing)
+        .where(Borrowing.id.in_(list(borrowing_ids)))
+        .values(reminded_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
 
 
 class BorrowService:
     async def create_borrowing(self, session: AsyncSession, borrowing_data: BorrowingCreateModel):
-        borrowing = borrowing_data.model_dump()
-        borrowing = Borrowing(**borrowing)
+        """
+        Check out the copy and record the borrowing in one short transaction.
+        The copy row is locked first; the book row, shared by every checkout of the title,
+        is locked last so it is held only for the counter update and the commit.
+        """
+        if borrowing_data.status not in NEW_BORROWING_STATUSES:
+            raise ValueError("A new borrowing must be requested or active")
+        book_id = await checkout_copy(session, borrowing_data.copy_id)
+        borrowing = Borrowing(**borrowing_data.model_dump())
+        return await self._record_checkout(session, borrowing, book_id, changed_by=borrowing.user_id)
+
+    async def borrow_book(self, session: AsyncSession, book_id: int, borrowing_data: BorrowingByBookCreateModel,
+                          user_id: int):
+        """Like create_borrowing, but the server picks the copy."""
+        copy_id = await checkout_any_copy(session, book_id, borrowing_data.location)
+        borrowing = Borrowing(copy_id=copy_id, user_id=user_id, due_date=borrowing_data.due_date,
+                              notes=borrowing_data.notes)
+        return await self._record_checkout(session, borrowing, book_id, changed_by=user_id)
+
+    async def claim_hold(self, session: AsyncSession, hold_id: int, claim: HoldClaimModel, user: User):
+        """Borrow the copy set aside for a ready hold."""
+        hold = await HoldService().get_hold(session, hold_id, user, for_update=True)
+        if hold is None:
+            return None
+        if hold.status != HoldStatus.READY or hold.expires_at < datetime.now():
+            raise ValueError("Hold is not ready for pick-up")
+        await set_copy_status(session, hold.copy_id, BookCopyStatus.RESERVED, BookCopyStatus.BORROWED)
+        hold.status = HoldStatus.FULFILLED
+        session.add(hold)
+        borrowing = Borrowing(copy_id=hold.copy_id, user_id=hold.user_id, due_date=claim.due_date, notes=claim.notes)
+        # A reserved copy was not counted as available
+        return await self._record_checkout(session, borrowing, hold.book_id, changed_by=user.id, available=0)
+
+    async def _record_checkout(self, session: AsyncSession, borrowing: Borrowing, book_id: int,
+                               changed_by: Optional[int], available: int = -1):
         session.add(borrowing)
+        await session.flush()
+        record_event(session, borrowing, changed_by)
+        await adjust_availability(session, book_id, available=available)
+        stale_keys = await copies_changed(session, {borrowing.copy_id: book_id})
+        if is_open(borrowing.status):
+            await take_loans(session, borrowing.user_id)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         await session.refresh(borrowing)
         return borrowing
 
+    async def bulk_checkout(self, session: AsyncSession, data: BulkCheckoutModel, librarian: User):
+        """
+        Lend a stack of scanned copies to one patron in a single transaction.
+        The copies are claimed by one conditional UPDATE on the copy_number index; borrowings, events
+        and counters are then written set-based. Copies that are unknown or not available, and those
+        scanned after the patron's loan limit was reached, are reported per item and do not fail the others.
+        """
+        if await session.get(User, data.user_id) is None:
+            raise UserNotFound()
+        copy_numbers = list(dict.fromkeys(data.copy_numbers))
+        scan_order = case({number: position for position, number in enumerate(copy_numbers)},
+                          value=BookCopy.copy_number)
+        claimable = (
+            select(BookCopy.id)
+            .where(BookCopy.copy_number.in_(copy_numbers), BookCopy.status == BookCopyStatus.AVAILABLE)
+            .order_by(scan_order)
+            .limit(await loans_left(session, data.user_id))
+            .with_for_update()
+        )
+        result = await session.exec(
+            update(BookCopy)
+            .where(BookCopy.id.in_(claimable.scalar_subquery()), BookCopy.status == BookCopyStatus.AVAILABLE)
+            .values(status=BookCopyStatus.BORROWED)
+            .returning(BookCopy.copy_number, BookCopy.id, BookCopy.book_id)
+            .execution_options(synchronize_session=False)
+        )
+        copies = {copy_number: (copy_id, book_id) for copy_number, copy_id, book_id in result.all()}
+
+        borrowing_ids = {}
+        if copies:
+            now = datetime.now()
+            result = await session.exec(
+                insert(Borrowing)
+                .values([
+                    {"copy_id": copy_id, "user_id": data.user_id, "borrowed_date": now, "due_date": data.due_date,
+                     "extended_times": 0, "status": BorrowingStatus.ACTIVE, "notes": data.notes,
+                     "accepted_by": librarian.id}
+                    for copy_id, _ in copies.values()
+                ])
+                .returning(Borrowing.id, Borrowing.copy_id)
+            )
+            borrowing_ids = {copy_id: borrowing_id for borrowing_id, copy_id in result.all()}
+            await record_events(session, ((borrowing_id, data.user_id) for borrowing_id in borrowing_ids.values()),
+                                BorrowingStatus.ACTIVE, changed_by=librarian.id)
+            available = {}
+            for _, book_id in copies.values():
+                available[book_id] = available.get(book_id, 0) - 1
+            await adjust_availability_many(session, available)
+        stale_keys = await copies_changed(session, dict(copies.values()))
+        if copies:
+            await take_loans(session, data.user_id, len(copies))
+        statuses = await self._copy_statuses(session, [number for number in copy_numbers if number not in copies])
+        await session.commit()
+        await catalog_cache.invalidate(stale_keys)
+
+        results = []
+        for number in copy_numbers:
+            if number in copies:
+                results.append({"copy_number": number, "borrowing_id": borrowing_ids[copies[number][0]]})
+            elif number not in statuses:
+                results.append({"copy_number": number, "error": "copy_not_found"})
+            elif statuses[number] == BookCopyStatus.AVAILABLE:
+                results.append({"copy_number": number, "error": "loan_limit_reached"})
+            else:
+                results.append({"copy_number": number, "error": "copy_not_available"})
+        return results
+
+    async def bulk_return(self, session: AsyncSession, copy_numbers: List[str], librarian: User):
+        """
+        Check in a stack of scanned copies in a single transaction.
+        The copies are resolved with one query on the copy_number index and their open borrowings
+        closed with one UPDATE; the copies are then released set-based (to the next hold on their
+        book, if any).
+        """
+        copy_numbers = list(dict.fromkeys(copy_numbers))
+        result = await session.exec(
+            select(BookCopy.id, BookCopy.copy_number).where(BookCopy.copy_number.in_(copy_numbers))
+        )
+        copy_ids = dict(result.all())
+        result = await session.exec(
+            update(Borrowing)
+            .where(Borrowing.copy_id.in_(list(copy_ids)), Borrowing.status.notin_(CLOSED_STATUSES))
+            .values(status=BorrowingStatus.RETURNED, returned_date=datetime.now())
+            .returning(Borrowing.copy_id, Borrowing.id, Borrowing.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        returned = {copy_ids[copy_id]: (borrowing_id, user_id, copy_id)
+                    for copy_id, borrowing_id, user_id in result.all()}
+
+        stale_keys = set()
+        if returned:
+            await record_events(session, ((borrowing_id, user_id) for borrowing_id, user_id, _ in returned.values()),
+                                BorrowingStatus.RETURNED, changed_by=librarian.id)
+            released = await release_copies(session, [copy_id for _, _, copy_id in returned.values()])
+            stale_keys = await copies_changed(session, released)
+            closed = {}
+            for _, user_id, _ in returned.values():
+                closed[user_id] = closed.get(user_id, 0) + 1
+            await release_loans(session, closed)
+        await session.commit()
+        await catalog_cache.invalidate(stale_keys)
+
+        known = set(copy_ids.values())
+        results = []
+        for number in copy_numbers:
+            if number in returned:
+                results.append({"copy_number": number, "borrowing_id": returned[number][0]})
+            else:
+                results.append({"copy_number": number,
+                                "error": "copy_not_borrowed" if number in known else "copy_not_found"})
+        return results
+
+    async def _copy_statuses(self, session: AsyncSession, copy_numbers: List[str]) -> dict:
+        """{copy number: status} of the copies that exist."""
+        if not copy_numbers:
+            return {}
+        result = await session.exec(
+            select(BookCopy.copy_number, BookCopy.status).where(BookCopy.copy_number.in_(copy_numbers))
+        )
+        return dict(result.all())
+
     async def get_borrowing(self, session: AsyncSession, borrowing_id: int, user: User):
-        statement = select(Borrowing).where(Borrowing.id == borrowing_id)
-        result = await session.exec(statement)
-        borrowing = result.first()
-        if borrowing is None:
-            return None
-        return borrowing
+        return await borrowing_by_id(session, borrowing_id)
 
     async def get_borrowings(
             self,
@@ -34,26 +348,21 @@ class BorrowService:
             copy_id: Optional[int] = None,
             status: Optional[BorrowingStatus] = None,
             accepted_by: Optional[int] = None,
+            after: Optional[str] = None,
             user: User=None,
     ):
-        statement = select(Borrowing).join(BookCopy, Borrowing.copy_id == BookCopy.id)
-
-        if not user.is_librarian():
-            statement = statement.where(Borrowing.user_id == user.id)
-        if copy_id is not None:
-            statement = statement.where(Borrowing.copy_id == copy_id)
-        if status is not None:
-            statement = statement.where(Borrowing.status == status)
-        if accepted_by is not None:
-            statement = statement.where(Borrowing.accepted_by == accepted_by)
-
-        statement = statement.offset(offset).limit(limit)
-        result = await session.exec(statement)
-        borrowings = result.all()
-        return borrowings
+        user_id = None if user.is_librarian() else user.id
+        return await borrowings_page(session, BORROWING_ORDER, limit, offset=offset, after=after, status=status,
+                                     user_id=user_id, copy_id=copy_id, accepted_by=accepted_by)
 
     async def update_borrowing(self, session: AsyncSession, borrowing_id: int, borrowing_data: BorrowingUpdateModel, user: User):
-        statement = select(Borrowing).where(Borrowing.id == borrowing_id)
+        # Locked so that two concurrent status changes cannot both return (or re-borrow) the copy
+        statement = (
+            select(Borrowing)
+            .where(Borrowing.id == borrowing_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
         result = await session.exec(statement)
         borrowing = result.first()
         if borrowing is None:
@@ -61,19 +370,87 @@ class BorrowService:
         if not user.is_librarian() and borrowing.user_id != user.id:
             raise InsufficientPermission()
 
-        for key, value in borrowing_data.model_dump(exclude_unset=True).items():
+        old_status = borrowing.status
+        old_due_date = borrowing.due_date
+        # Every field of the update model is required; those sent as null are left as they are
+        changes = {key: value for key, value in borrowing_data.model_dump().items() if value is not None}
+        # Counted here, one per extension of the due date; clients cannot rewind it
+        extended_times = changes.pop("extended_times", None)
+        if extended_times is not None and extended_times < borrowing.extended_times:
+            raise ValueError("extended_times cannot decrease")
+        due_date = changes.get("due_date")
+        if not user.is_librarian():
+            # Patrons may only extend an open loan of their own, within their extension limit
+            changed = {key for key, value in changes.items() if getattr(borrowing, key) != value}
+            if changed - PATRON_BORROWING_FIELDS:
+                raise InsufficientPermission()
+            if due_date is not None and (due_date < old_due_date or not is_open(old_status)):
+                raise ValueError("Only the due date of an open borrowing can be extended")
+        for key, value in changes.items():
             setattr(borrowing, key, value)
+        if due_date is not None and due_date != old_due_date:
+            # Remind again of the new due date
+            borrowing.reminded_at = None
+        if due_date is not None and due_date > old_due_date:
+            borrowing.extended_times += 1
+            borrower = user if borrowing.user_id == user.id else await session.get(User, borrowing.user_id)
+            check_extensions(borrower, borrowing.extended_times)
+        if borrowing.status != old_status:
+            record_event(session, borrowing, changed_by=user.id, notes=changes.get("notes"))
+        was_returned = old_status == BorrowingStatus.RETURNED
+        is_returned = borrowing.status == BorrowingStatus.RETURNED
+
+        book_id = None
+        if is_returned and not was_returned:
+            # Goes to the next hold on the book, if any
+            book_id = await release_copy(session, borrowing.copy_id)
+        elif was_returned and not is_returned:
+            # Only while the copy is on the shelf: it may have been lent again or set aside for a hold
+            book_id = await set_copy_status(session, borrowing.copy_id, BookCopyStatus.AVAILABLE,
+                                            BookCopyStatus.BORROWED)
+            if book_id is None:
+                raise ValueError("The copy is no longer available; this borrowing cannot be reopened")
+            await adjust_availability(session, book_id, available=-1)
+        stale_keys = await copies_changed(session, {borrowing.copy_id: book_id} if book_id is not None else {})
+        if is_open(borrowing.status) and not is_open(old_status):
+            await take_loans(session, borrowing.user_id)
+        elif is_open(old_status) and not is_open(borrowing.status):
+            await release_loans(session, {borrowing.user_id: 1})
         session.add(borrowing)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         await session.refresh(borrowing)
         return borrowing
 
+    async def get_borrowing_history(self, session: AsyncSession, borrowing_id: int, user: User,
+                                    offset: int = 0, limit: int = 10, after: Optional[str] = None):
+        statement = select(BorrowingEvent).where(BorrowingEvent.borrowing_id == borrowing_id)
+        if not user.is_librarian():
+            statement = statement.where(BorrowingEvent.user_id == user.id)
+        result = await session.exec(paginate(statement, HISTORY_ORDER, limit, offset=offset, after=after))
+        return result.all()
+
+    async def get_user_history(self, session: AsyncSession, user_id: int, user: User,
+                               offset: int = 0, limit: int = 10, after: Optional[str] = None):
+        if not user.is_librarian() and user_id != user.id:
+            raise InsufficientPermission()
+        statement = select(BorrowingEvent).where(BorrowingEvent.user_id == user_id)
+        result = await session.exec(paginate(statement, HISTORY_ORDER, limit, offset=offset, after=after))
+        return result.all()
+
     async def delete_borrowing(self, session: AsyncSession, borrowing_id: int) -> bool:
-        statement = select(Borrowing).where(Borrowing.id == borrowing_id)
+        statement = select(Borrowing).where(Borrowing.id == borrowing_id).with_for_update()
         result = await session.exec(statement)
         borrowing = result.first()
         if borrowing is None:
             return False
+        book_id = None
+        if borrowing.status != BorrowingStatus.RETURNED:
+            book_id = await release_copy(session, borrowing.copy_id)
+        stale_keys = await copies_changed(session, {borrowing.copy_id: book_id} if book_id is not None else {})
+        if is_open(borrowing.status):
+            await release_loans(session, {borrowing.user_id: 1})
         await session.delete(borrowing)
         await session.commit()
+        await catalog_cache.invalidate(stale_keys)
         return True
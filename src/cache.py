@@ -0,0 +1,169 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Type
+
+from fastapi.responses import Response
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlmodel import SQLModel
+
+INVALIDATE_BATCH_SIZE = 1000
+STATS_FLUSH_EVERY = 100
+
+
+class LocalCache:
+    """
+    Per-process LRU whose entries carry their own expiry (a ``time.time()`` timestamp).
+    For small, hot values where even a Redis round trip is too much; not shared between workers.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        if self.maxsize <= 0 or expires_at <= time.time():
+            return
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose value matches; linear, for rare invalidations."""
+        for key in [key for key, (value, _) in self._entries.items() if predicate(value)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class ResponseCache:
+    """
+    Read-through cache of serialized response models in Redis.
+    Redis failures never fail a request: lookups fall back to the loader and are counted as errors.
+    """
+
+    def __init__(self, client: Redis, prefix: str, ttl: int):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.stats_key = f"{prefix}:stats"
+        self._local = {"hits": 0, "misses": 0, "errors": 0}
+        self._pending = {"hits": 0, "misses": 0, "errors": 0}
+
+    def key(self, *parts: Any) -> str:
+        return ":".join([self.prefix, *(str(part) for part in parts)])
+
+    async def _count(self, name: str) -> None:
+        self._local[name] += 1
+        self._pending[name] += 1
+        if sum(self._pending.values()) < STATS_FLUSH_EVERY:
+            return
+        pending, self._pending = self._pending, {"hits": 0, "misses": 0, "errors": 0}
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for field, value in pending.items():
+                    if value:
+                        pipe.hincrby(self.stats_key, field, value)
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning("Could not flush cache stats: %s", e)
+
+    async def get(self, key: str) -> Optional[Dict[str, bytes]]:
+        try:
+            entry = await self.client.hgetall(key)
+        except RedisError as e:
+            logging.warning("Cache read failed for %s: %s", key, e)
+            await self._count("errors")
+            return None
+        await self._count("hits" if entry else "misses")
+        return entry or None
+
+    async def get_headers(self, key: str, *names: str) -> Optional[Dict[str, str]]:
+        """Headers stored with an entry (e.g. validators), without transferring the body."""
+        try:
+            values = await self.client.hmget(key, names)
+        except RedisError as e:
+            logging.warning("Cache read failed for %s: %s", key, e)
+            await self._count("errors")
+            return None
+        headers = {name: value.decode() for name, value in zip(names, values) if value is not None}
+        await self._count("hits" if headers else "misses")
+        return headers or None
+
+    async def set(self, key: str, body: str, headers: Optional[Dict[str, str]] = None) -> None:
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"body": body, **(headers or {})})
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning("Cache write failed for %s: %s", key, e)
+
+    async def read_through(self, key: str, load: Callable[[], Awaitable[Any]], model: Type[SQLModel],
+                           headers: Callable[[Any], Dict[str, str]] = None) -> Optional[Response]:
+        """
+        Return the cached JSON for ``key`` or load, serialize and store it.
+        ``headers`` derives response headers from the loaded object; they are cached with the body.
+        Returns None when the loader finds nothing; misses are not cached.
+        """
+        entry = await self.get(key)
+        if entry is not None and b"body" in entry:
+            stored = {field.decode(): value.decode() for field, value in entry.items() if field != b"body"}
+            return Response(content=entry[b"body"], media_type="application/json", headers=stored)
+        obj = await load()
+        if obj is None:
+            return None
+        payload = model.model_validate(obj).model_dump_json()
+        extra = headers(obj) if headers else {}
+        await self.set(key, payload, extra)
+        return Response(content=payload, media_type="application/json", headers=extra)
+
+    async def invalidate(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        try:
+            for start in range(0, len(keys), INVALIDATE_BATCH_SIZE):
+                await self.client.unlink(*keys[start:start + INVALIDATE_BATCH_SIZE])
+        except RedisError as e:
+            logging.error("Cache invalidation failed, entries expire in %ss: %s", self.ttl, e)
+
+    async def clear(self) -> None:
+        """Drop every entry under this cache's prefix (used after bulk changes)."""
+        batch = []
+        try:
+            async for key in self.client.scan_iter(match=f"{self.prefix}:*", count=INVALIDATE_BATCH_SIZE):
+                if key.decode() == self.stats_key:
+                    continue
+                batch.append(key)
+                if len(batch) >= INVALIDATE_BATCH_SIZE:
+                    await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.client.unlink(*batch)
+        except RedisError as e:
+            logging.error("Cache clear failed, entries expire in %ss: %s", self.ttl, e)
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        """Counters of this worker and, when Redis is reachable, of all workers."""
+        try:
+            shared = await self.client.hgetall(self.stats_key)
+            shared = {field.decode(): int(value) for field, value in shared.items()}
+        except RedisError:
+            shared = {}
+        return {"worker": dict(self._local), "all_workers": shared}
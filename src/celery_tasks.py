@@ -1,7 +1,19 @@
+from itertools import groupby
+
 from celery import Celery
-from src.mail import mail, create_message
+from src.config import Config
+from src.mail import mail, create_message, create_template_message
 from asgiref.sync import async_to_sync
 
+from src.books.availability import reconcile_availability
+from src.books.search import backfill_search_vectors
+from src.borrowings.archive import archive_batch
+from src.borrowings.quotas import reconcile_loan_counts as reconcile_loans
+from src.borrowings.services import due_soon_digests, mark_overdue_batch, mark_reminded, overdue_notices
+from src.db.main import task_engine, task_session_maker
+from src.db.partitions import ensure_monthly_partitions
+from src.holds.services import expire_holds
+
 c_app = Celery()
 
 c_app.config_from_object("src.config")
@@ -14,3 +26,155 @@ def send_email(recipients: list[str], subject: str, body: str):
 
     async_to_sync(mail.send_message)(message)
     print("Email sent")
+
+
+async def _backfill_search_vectors(batch_size: int = None) -> int:
+    async with task_session_maker() as session:
+        return await backfill_search_vectors(session, batch_size)
+
+
+@c_app.task()
+def backfill_book_search_vectors(batch_size: int = None):
+    indexed = async_to_sync(_backfill_search_vectors)(batch_size)
+    print(f"Indexed {indexed} books for search")
+    return indexed
+
+
+async def _reconcile_availability(batch_size: int = None) -> int:
+    async with task_session_maker() as session:
+        return len(await reconcile_availability(session, batch_size))
+
+
+@c_app.task()
+def reconcile_book_availability(batch_size: int = None):
+    fixed = async_to_sync(_reconcile_availability)(batch_size)
+    print(f"Fixed availability counters of {fixed} books")
+    return fixed
+
+
+async def _reconcile_loans(batch_size: int = None) -> int:
+    async with task_session_maker() as session:
+        return len(await reconcile_loans(session, batch_size))
+
+
+@c_app.task()
+def reconcile_loan_counts(batch_size: int = None):
+    fixed = async_to_sync(_reconcile_loans)(batch_size)
+    print(f"Fixed loan counters of {fixed} users")
+    return fixed
+
+
+async def _expire_holds(batch_size: int = None) -> int:
+    async with task_session_maker() as session:
+        return await expire_holds(session, batch_size)
+
+
+@c_app.task()
+def expire_unclaimed_holds(batch_size: int = None):
+    expired = async_to_sync(_expire_holds)(batch_size)
+    print(f"Expired {expired} unclaimed holds")
+    return expired
+
+
+async def _mark_overdue(batch_size: int = None) -> int:
+    total = 0
+    async with task_session_maker() as session:
+        while ids := await mark_overdue_batch(session, batch_size):
+            notify_overdue_borrowings.delay(ids)
+            total += len(ids)
+    return total
+
+
+@c_app.task()
+def mark_overdue_borrowings(batch_size: int = None):
+    marked = async_to_sync(_mark_overdue)(batch_size)
+    print(f"Marked {marked} borrowings overdue")
+    return marked
+
+
+async def _archive_borrowings(days: int = None, batch_size: int = None) -> int:
+    total = 0
+    async with task_session_maker() as session:
+        while moved := await archive_batch(session, days, batch_size):
+            total += moved
+    return total
+
+
+@c_app.task()
+def archive_closed_borrowings(days: int = None, batch_size: int = None):
+    archived = async_to_sync(_archive_borrowings)(days, batch_size)
+    print(f"Archived {archived} closed borrowings")
+    return archived
+
+
+async def _overdue_notices(borrowing_ids: list[int]):
+    async with task_session_maker() as session:
+        return await overdue_notices(session, borrowing_ids)
+
+
+@c_app.task()
+def notify_overdue_borrowings(borrowing_ids: list[int]):
+    notices = async_to_sync(_overdue_notices)(borrowing_ids)
+    for email, rows in groupby(notices, key=lambda row: row.email):
+        rows = list(rows)
+        items = "".join(f"<li>{row.title} (due {row.due_date:%Y-%m-%d})</li>" for row in rows)
+        html = f"""
+                <h1>Overdue books</h1>
+                <p> Hi {rows[0].first_name}, the following books are past their due date:<p>
+                <ul>{items}</ul>
+                <p> Please return them as soon as possible.<p>
+                """
+        send_email.delay([email], "Overdue books", html)
+
+
+async def _queue_reminder_chunk(chunk: list[dict]) -> None:
+    # Marked first: a reminder may be lost if queueing fails, but is never sent twice
+    async with task_session_maker() as session:
+        await mark_reminded(session, [borrowing_id for digest in chunk for borrowing_id in digest["borrowing_ids"]])
+    send_reminder_digests.delay(chunk)
+
+
+async def _queue_due_reminders(days: int = None) -> int:
+    total = 0
+    chunk = []
+    async with task_session_maker() as session:
+        async for digest in due_soon_digests(session, days):
+            chunk.append(digest)
+            if len(chunk) >= Config.REMINDER_CHUNK_SIZE:
+                await _queue_reminder_chunk(chunk)
+                total += len(chunk)
+                chunk = []
+    if chunk:
+        await _queue_reminder_chunk(chunk)
+        total += len(chunk)
+    return total
+
+
+@c_app.task()
+def send_due_reminders(days: int = None):
+    queued = async_to_sync(_queue_due_reminders)(days)
+    print(f"Queued {queued} due-date reminder digests")
+    return queued
+
+
+@c_app.task(rate_limit=Config.MAIL_RATE_LIMIT)
+def send_reminder_digests(digests: list[dict]):
+    async def send_all():
+        # FastMail.send_message takes a single message in the pinned fastapi-mail
+        for digest in digests:
+            message = create_template_message(recipients=[digest["email"]], subject="Books due soon",
+                                              template_body=digest)
+            await mail.send_message(message, template_name="due_reminder.html")
+
+    async_to_sync(send_all)()
+    print(f"Sent {len(digests)} reminder digests")
+
+
+async def _ensure_partitions() -> None:
+    async with task_engine.begin() as conn:
+        await ensure_monthly_partitions(conn)
+
+
+@c_app.task()
+def ensure_partitions():
+    async_to_sync(_ensure_partitions)()
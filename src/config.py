@@ -1,8 +1,66 @@
+from typing import Dict
+
+from celery.schedules import crontab
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Set to 0 behind pgbouncer in transaction mode
+    DB_CONNECT_TIMEOUT: float = 10
+    DB_COMMAND_TIMEOUT: float = 60
+    DB_ECHO: bool = False
+    SEARCH_TEXT_CONFIG: str = "english"
+    SEARCH_BACKFILL_BATCH_SIZE: int = 5000
+    IMPORT_COPY_BATCH_SIZE: int = 10000
+    IMPORT_COMMAND_TIMEOUT: float = 1800
+    BOOK_BATCH_MAX_SIZE: int = 500
+    CIRCULATION_BATCH_MAX_SIZE: int = 100  # copies per bulk checkout / return
+    EXPORT_BATCH_SIZE: int = 1000
+    CATALOG_CACHE_TTL: int = 300
+    AVAILABILITY_RECONCILE_BATCH_SIZE: int = 5000
+    HOLD_PICKUP_DAYS: int = 3
+    HOLD_EXPIRY_BATCH_SIZE: int = 500
+    OVERDUE_SWEEP_BATCH_SIZE: int = 1000
+    OVERDUE_SWEEP_INTERVAL: float = 300
+    HOLD_EXPIRY_INTERVAL: float = 900
+    AVAILABILITY_RECONCILE_INTERVAL: float = 86400
+    # Per role; JSON in the environment, e.g. LOAN_LIMITS='{"user": 5}'
+    LOAN_LIMITS: Dict[str, int] = {"user": 10, "librarian": 20, "admin": 20}
+    EXTENSION_LIMITS: Dict[str, int] = {"user": 3, "librarian": 5, "admin": 5}
+    LOAN_RECONCILE_BATCH_SIZE: int = 5000
+    LOAN_RECONCILE_INTERVAL: float = 86400
+    REMINDER_DAYS_AHEAD: int = 3
+    REMINDER_HOUR: int = 6
+    REMINDER_FETCH_SIZE: int = 5000
+    REMINDER_CHUNK_SIZE: int = 100  # digests sent per task
+    MAIL_RATE_LIMIT: str = "30/m"  # digest chunks per minute, per worker
+    PARTITION_MONTHS_AHEAD: int = 3
+    BORROWING_ARCHIVE_AFTER_DAYS: int = 90
+    BORROWING_ARCHIVE_BATCH_SIZE: int = 1000
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # hashes with another cost are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 4  # threads per process; bcrypt releases the GIL
+    TOKEN_CACHE_SIZE: int = 10000  # verified tokens and blocklist lookups kept per process
+    BLOCKLIST_LOCAL_TTL: float = 5  # how long a worker may miss a revocation if pub/sub drops it
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL: float = 60  # bounds staleness of user changes made outside UserService
+    TOKEN_VERSION_CACHE_SIZE: int = 10000
+    TOKEN_VERSION_CACHE_TTL: float = 300  # how long an access token outlives a change made outside UserService
+    # Token buckets, "<requests>/<s|m|h>": bursts of up to <requests>, refilled over the period
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/m"  # login attempts per client IP
+    RATE_LIMIT_LOGIN_ACCOUNT: str = "20/h"  # login attempts per email, from any number of IPs
+    RATE_LIMIT_IP: str = "120/m"  # unauthenticated requests per client IP
+    RATE_LIMIT_USER: str = "600/m"
+    RATE_LIMIT_API_KEY: str = "1200/m"
+    RATE_LIMIT_LOCAL_SIZE: int = 10000  # per-process buckets used while Redis is unreachable
+    RATE_LIMIT_REDIS_RETRY: float = 5
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.2  # seconds a request may wait on Redis before using the local buckets
     API_SECRET_KEY: str
     JWT_SECRET: str
     JWT_ALGORITHM: str
@@ -27,3 +85,33 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+beat_schedule = {
+    "mark-overdue-borrowings": {
+        "task": "src.celery_tasks.mark_overdue_borrowings",
+        "schedule": Config.OVERDUE_SWEEP_INTERVAL,
+    },
+    "expire-unclaimed-holds": {
+        "task": "src.celery_tasks.expire_unclaimed_holds",
+        "schedule": Config.HOLD_EXPIRY_INTERVAL,
+    },
+    "reconcile-book-availability": {
+        "task": "src.celery_tasks.reconcile_book_availability",
+        "schedule": Config.AVAILABILITY_RECONCILE_INTERVAL,
+    },
+    "reconcile-loan-counts": {
+        "task": "src.celery_tasks.reconcile_loan_counts",
+        "schedule": Config.LOAN_RECONCILE_INTERVAL,
+    },
+    "ensure-monthly-partitions": {
+        "task": "src.celery_tasks.ensure_partitions",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "archive-closed-borrowings": {
+        "task": "src.celery_tasks.archive_closed_borrowings",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "send-due-reminders": {
+        "task": "src.celery_tasks.send_due_reminders",
+        "schedule": crontab(hour=Config.REMINDER_HOUR, minute=0),
+    },
+}
@@ -16,6 +16,7 @@ class BookCopyStatus(str, Enum):
     """
     AVAILABLE = "available"
     BORROWED = "borrowed"
+    RESERVED = "reserved"  # set aside for a ready hold
 
 
 class BorrowingStatus(str, Enum):
@@ -30,3 +31,14 @@ class BorrowingStatus(str, Enum):
     LOST = "lost"
 
 
+
+
+class HoldStatus(str, Enum):
+    """
+    Enum for hold status.
+    """
+    WAITING = "waiting"
+    READY = "ready"
+    FULFILLED = "fulfilled"
+    CANCELLED = "cancelled"
+    EXPIRED = "expired"
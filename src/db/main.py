@@ -1,23 +1,81 @@
-from sqlalchemy.ext.asyncio import AsyncEngine
-from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel, create_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.config import Config
+from src.db.partitions import ensure_monthly_partitions
 
-async_engine = AsyncEngine(create_engine(url=Config.DATABASE_URL))
+async_engine = create_async_engine(
+    url=Config.DATABASE_URL,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_timeout=Config.DB_POOL_TIMEOUT,
+    pool_recycle=Config.DB_POOL_RECYCLE,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    echo=Config.DB_ECHO,
+    connect_args={
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "timeout": Config.DB_CONNECT_TIMEOUT,
+        "command_timeout": Config.DB_COMMAND_TIMEOUT,
+    },
+)
+
+async_session_maker = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Celery tasks drive coroutines through async_to_sync, which does not keep one event loop
+# alive between calls, so they get unpooled connections instead of sharing the API pool.
+task_engine = create_async_engine(
+    url=Config.DATABASE_URL,
+    poolclass=NullPool,
+    connect_args={
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "timeout": Config.DB_CONNECT_TIMEOUT,
+        "command_timeout": Config.DB_COMMAND_TIMEOUT,
+    },
+)
+
+task_session_maker = async_sessionmaker(
+    bind=task_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Bulk imports run a few set-based statements over the whole file, which may take longer than
+# DB_COMMAND_TIMEOUT; they are rare, so they open their own connection with a longer limit.
+import_engine = create_async_engine(
+    url=Config.DATABASE_URL,
+    poolclass=NullPool,
+    connect_args={
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "timeout": Config.DB_CONNECT_TIMEOUT,
+        "command_timeout": Config.IMPORT_COMMAND_TIMEOUT,
+    },
+)
+
+import_session_maker = async_sessionmaker(
+    bind=import_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 async def init_db() -> None:
     async with async_engine.begin() as conn:
         from src.db.models import User
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(SQLModel.metadata.create_all)
+        await ensure_monthly_partitions(conn)
+
+
+async def close_db() -> None:
+    await async_engine.dispose()
 
 
 async def get_session() -> AsyncSession:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async with async_session_maker() as session:
+        yield session
+
 
-    async with Session() as session:
+async def get_import_session() -> AsyncSession:
+    async with import_session_maker() as session:
         yield session
@@ -2,10 +2,11 @@ from datetime import datetime, date
 from typing import Optional, List
 
 from pydantic import EmailStr
+from sqlalchemy import Index, text
 from sqlalchemy.dialects import postgresql as pg
 from sqlmodel import SQLModel, Field, Column, Relationship
 
-from src.db.enums import UserRole, BookCopyStatus, BorrowingStatus
+from src.db.enums import UserRole, BookCopyStatus, BorrowingStatus, HoldStatus
 
 
 class User(SQLModel, table=True):
@@ -17,13 +18,17 @@ class User(SQLModel, table=True):
     role: UserRole = Field(default=UserRole.USER)
     is_active: bool = Field(default=True)
     password_hash: str = Field(sa_column=Column(pg.VARCHAR, nullable=False), exclude=True)
+    # Borrowings not yet returned or lost, maintained by src.borrowings.quotas
+    active_loans: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default=text("0")))
+    # Bumped when a claim carried by access tokens changes; older tokens are rejected, see src.auth.principal
+    token_version: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default=text("0")))
     created_at: datetime = Field(default_factory=datetime.now, sa_column=Column(pg.TIMESTAMP, nullable=False))
     updated_at: datetime = Field(default_factory=datetime.now,
                                  sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
 
     # Relationships
     borrowings: List["Borrowing"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin","foreign_keys": "[Borrowing.user_id]"}
+        back_populates="user", sa_relationship_kwargs={"foreign_keys": "[Borrowing.user_id]"}
     )
     api_keys: Optional["ApiKey"] = Relationship(back_populates="user")
 
@@ -54,10 +59,11 @@ class Author(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     first_name: str
     last_name: str
+    updated_at: datetime = Field(default_factory=datetime.now,
+                                 sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
 
     # Relationships
-    books: List["Book"] = Relationship(back_populates="authors", sa_relationship_kwargs={"lazy": "selectin"},
-                                       link_model=BookAuthor)
+    books: List["Book"] = Relationship(back_populates="authors", link_model=BookAuthor)
 
 
 class Publisher(SQLModel, table=True):
@@ -69,9 +75,11 @@ class Publisher(SQLModel, table=True):
     contact_email: Optional[str] = None
     contact_phone: Optional[str] = None
     website: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.now,
+                                 sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
 
     # Relationships
-    books: List["Book"] = Relationship(back_populates="publisher", sa_relationship_kwargs={"lazy": "selectin"})
+    books: List["Book"] = Relationship(back_populates="publisher")
 
 
 class Category(SQLModel, table=True):
@@ -80,13 +88,23 @@ class Category(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     category_name: str = Field(unique=True, index=True)
     description: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.now,
+                                 sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
 
-    books: List["Book"] = Relationship(back_populates="categories", sa_relationship_kwargs={"lazy": "selectin"},
-                                       link_model=BookCategory)
+    books: List["Book"] = Relationship(back_populates="categories", link_model=BookCategory)
 
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_title_id", "title", "id"),
+        Index("ix_books_updated_at", "updated_at"),
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_books_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_books_available_title_id", "title", "id", postgresql_where=text("available_copies > 0")),
+    )
+    # search_vector is maintained by src.books.search and never loaded into the ORM object
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     isbn: str = Field(unique=True, index=True)
@@ -100,24 +118,23 @@ class Book(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.now, sa_column=Column(pg.TIMESTAMP, nullable=False))
     updated_at: datetime = Field(default_factory=datetime.now,
                                  sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
+    search_vector: Optional[str] = Field(default=None, sa_column=Column(pg.TSVECTOR, nullable=True), exclude=True)
+    # Maintained by src.books.availability
+    total_copies: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default=text("0")))
+    available_copies: int = Field(default=0, sa_column=Column(pg.INTEGER, nullable=False, server_default=text("0")))
 
     # Relationships
-    publisher: Optional[Publisher] = Relationship(back_populates="books", sa_relationship_kwargs={"lazy": "selectin"})
-    categories: List[Category] = Relationship(
-        back_populates="books",
-        sa_relationship_kwargs={"lazy": "selectin"},
-        link_model=BookCategory,
-    )
-    authors: List[Author] = Relationship(
-        back_populates="books",
-        sa_relationship_kwargs={"lazy": "selectin"},
-        link_model=BookAuthor
-    )
-    book_copies: List["BookCopy"] = Relationship(back_populates="book", sa_relationship_kwargs={"lazy": "selectin"})
+    publisher: Optional[Publisher] = Relationship(back_populates="books")
+    categories: List[Category] = Relationship(back_populates="books", link_model=BookCategory)
+    authors: List[Author] = Relationship(back_populates="books", link_model=BookAuthor)
+    book_copies: List["BookCopy"] = Relationship(back_populates="book")
 
 
 class BookCopy(SQLModel, table=True):
     __tablename__ = "book_copies"
+    __table_args__ = (
+        Index("ix_book_copies_available_book_id", "book_id", postgresql_where=text("status = 'available'")),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     book_id: int = Field(foreign_key="books.id", index=True)
@@ -127,15 +144,25 @@ class BookCopy(SQLModel, table=True):
     location: Optional[str] = None
     condition: Optional[str] = None
     notes: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.now,
+                                 sa_column=Column(pg.TIMESTAMP, nullable=False, onupdate=datetime.now))
 
     # Relationships
     book: Book = Relationship(back_populates="book_copies")
-    borrowings: List["Borrowing"] = Relationship(back_populates="book_copy",
-                                                 sa_relationship_kwargs={"lazy": "selectin"})
+    borrowings: List["Borrowing"] = Relationship(back_populates="book_copy")
 
 
 class Borrowing(SQLModel, table=True):
     __tablename__ = "borrowings"
+    __table_args__ = (
+        Index("ix_borrowings_borrowed_date_id", "borrowed_date", "id"),
+        Index("ix_borrowings_user_id_borrowed_date_id", "user_id", "borrowed_date", "id"),
+        # status is a Postgres enum of the member names
+        Index("ix_borrowings_active_due_date", "due_date", postgresql_where=text("status = 'ACTIVE'")),
+        # Archival candidates (see src.borrowings.archive)
+        Index("ix_borrowings_closed_at", text("coalesce(returned_date, due_date)"),
+              postgresql_where=text("status IN ('RETURNED', 'LOST')")),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     copy_id: int = Field(foreign_key="book_copies.id", index=True)
@@ -147,6 +174,7 @@ class Borrowing(SQLModel, table=True):
     status: BorrowingStatus = Field(default=BorrowingStatus.REQUESTED)
     notes: Optional[str] = None
     accepted_by: int = Field(nullable=True, foreign_key="users.id")  # Librarian ID
+    reminded_at: Optional[datetime] = None  # due-date reminder queued; cleared when the due date moves
 
     # Relationships
     lended_user: Optional[User] = Relationship(sa_relationship_kwargs={"foreign_keys": "[Borrowing.accepted_by]"})
@@ -155,6 +183,72 @@ class Borrowing(SQLModel, table=True):
     book_copy: BookCopy = Relationship(back_populates="borrowings")
 
 
+class BorrowingArchive(SQLModel, table=True):
+    """
+    Borrowings closed long enough ago to be moved out of ``borrowings`` (see src.borrowings.archive).
+    Same columns and ids as ``borrowings``; no foreign keys, so copies and users can still be removed.
+    """
+    __tablename__ = "borrowings_archive"
+    __table_args__ = (
+        Index("ix_borrowings_archive_borrowed_date_id", "borrowed_date", "id"),
+        Index("ix_borrowings_archive_user_id_borrowed_date_id", "user_id", "borrowed_date", "id"),
+    )
+
+    id: int = Field(primary_key=True)
+    copy_id: int = Field(index=True)
+    user_id: int
+    borrowed_date: datetime
+    due_date: datetime
+    returned_date: Optional[datetime] = None
+    extended_times: int = 0
+    status: BorrowingStatus
+    notes: Optional[str] = None
+    accepted_by: Optional[int] = None
+    archived_at: datetime = Field(default_factory=datetime.now)
+
+
+class BorrowingEvent(SQLModel, table=True):
+    """Append-only log of borrowing status changes, range-partitioned by month (see src.db.partitions)."""
+    __tablename__ = "borrowing_events"
+    __table_args__ = (
+        # Covering, so both history endpoints are index-only scans
+        Index("ix_borrowing_events_borrowing_id_changed_at", "borrowing_id", "changed_at", "id",
+              postgresql_include=["user_id", "status", "changed_by", "notes"]),
+        Index("ix_borrowing_events_user_id_changed_at", "user_id", "changed_at", "id",
+              postgresql_include=["borrowing_id", "status", "changed_by", "notes"]),
+        {"postgresql_partition_by": "RANGE (changed_at)"},
+    )
+
+    # The partition key has to be part of the primary key
+    id: Optional[int] = Field(default=None, sa_column=Column(pg.BIGINT, primary_key=True, autoincrement=True))
+    changed_at: datetime = Field(default_factory=datetime.now, sa_column=Column(pg.TIMESTAMP, primary_key=True))
+    borrowing_id: int
+    user_id: int  # the borrower
+    status: BorrowingStatus
+    changed_by: Optional[int] = None
+    notes: Optional[str] = None
+
+
+class Hold(SQLModel, table=True):
+    __tablename__ = "holds"
+    __table_args__ = (
+        # The queue of a book: next hold and queue positions are index range reads
+        Index("ix_holds_waiting_book_id_id", "book_id", "id", postgresql_where=text("status = 'waiting'")),
+        Index("ix_holds_ready_expires_at", "expires_at", postgresql_where=text("status = 'ready'")),
+        Index("ux_holds_active_user_id_book_id", "user_id", "book_id", unique=True,
+              postgresql_where=text("status IN ('waiting', 'ready')")),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    book_id: int = Field(foreign_key="books.id")
+    user_id: int = Field(foreign_key="users.id", index=True)
+    copy_id: Optional[int] = Field(default=None, foreign_key="book_copies.id")  # set aside once ready
+    status: HoldStatus = Field(default=HoldStatus.WAITING, sa_column=Column(pg.VARCHAR(20), nullable=False))
+    created_at: datetime = Field(default_factory=datetime.now, sa_column=Column(pg.TIMESTAMP, nullable=False))
+    ready_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None  # pick-up deadline of a ready hold
+
+
 class ApiKey(SQLModel, table=True):
     __tablename__ = "api_keys"
 
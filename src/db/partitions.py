@@ -0,0 +1,62 @@
+"""
+Monthly range partitions for append-only tables. Partitions are created ahead of time
+by a periodic task; the DEFAULT partition only catches rows if that task falls behind.
+Postgres refuses a new partition while the DEFAULT one holds rows in its range, so those
+rows are moved into the new partition before it is attached.
+"""
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.config import Config
+
+# Table -> partition key column
+MONTHLY_PARTITIONED_TABLES = {"borrowing_events": "changed_at"}
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def monthly_partition_ddl(table: str, month: date) -> str:
+    start = month.replace(day=1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_{start:%Y_%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start}') TO ('{add_months(start, 1)}')"
+    )
+
+
+async def create_monthly_partition(conn: AsyncConnection, table: str, column: str, month: date) -> None:
+    """Create ``table``'s partition for ``month`` unless it exists, taking over its rows from the DEFAULT partition."""
+    start, end = month.replace(day=1), add_months(month, 1)
+    partition = f"{table}_{start:%Y_%m}"
+    if (await conn.execute(text("SELECT to_regclass(:name)"), {"name": partition})).scalar() is not None:
+        return
+    in_range = f"{column} >= '{start}' AND {column} < '{end}'"
+    stranded = await conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {in_range})"))
+    if not stranded.scalar():
+        await conn.execute(text(monthly_partition_ddl(table, start)))
+        return
+    await conn.execute(text(f"CREATE TABLE {partition} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {partition} SELECT * FROM moved"
+    ))
+    await conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {partition} FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+
+
+async def ensure_monthly_partitions(conn: AsyncConnection, months_ahead: int = None) -> None:
+    """
+    Create this month's partition and the next ``months_ahead`` ones for every partitioned table.
+    Run in a transaction, so rows moved out of a DEFAULT partition are never visible twice.
+    """
+    months_ahead = Config.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = date.today().replace(day=1)
+    for table, column in MONTHLY_PARTITIONED_TABLES.items():
+        await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+        for offset in range(months_ahead + 1):
+            await create_monthly_partition(conn, table, column, add_months(this_month, offset))
@@ -1,17 +1,97 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Tuple
+
 import redis.asyncio as aioredis
+from redis.exceptions import RedisError
 
+from src.cache import LocalCache
 from src.config import Config
 
 JTI_EXPIRY = 3600
+BLOCKLIST_CHANNEL = "auth:blocklist"
+
+redis_client = aioredis.from_url(Config.REDIS_URL)
+
+# Consulted on every request, so an unresponsive Redis must fail fast rather than stall them
+rate_limit_client = aioredis.from_url(
+    Config.REDIS_URL,
+    socket_timeout=Config.RATE_LIMIT_REDIS_TIMEOUT,
+    socket_connect_timeout=Config.RATE_LIMIT_REDIS_TIMEOUT,
+)
+
+token_blocklist = redis_client
+
+# Pub/sub channel -> (handler of its messages, local cache it keeps in sync); see listen_for_invalidations
+_channel_handlers: Dict[str, List[Tuple[Callable[[str], None], LocalCache]]] = {}
+
+
+def on_invalidation(channel: str, cache: LocalCache):
+    """Register a handler that applies messages published on ``channel`` to ``cache`` in this process."""
+    def register(handler: Callable[[str], None]) -> Callable[[str], None]:
+        _channel_handlers.setdefault(channel, []).append((handler, cache))
+        return handler
+    return register
 
-token_blocklist = aioredis.from_url(Config.REDIS_URL)
+
+async def publish_invalidation(channel: str, message: str, ttl: float) -> None:
+    """
+    Apply ``message`` to this process's caches and publish it to the other workers.
+    If Redis is down they keep stale entries for up to ``ttl`` seconds.
+    """
+    for handler, _ in _channel_handlers.get(channel, ()):
+        handler(message)
+    try:
+        await redis_client.publish(channel, message)
+    except RedisError as e:
+        logging.error("Could not publish %s on %s, other workers catch up in %ss: %s", message, channel, ttl, e)
+
+
+# jti -> revoked; misses are kept for BLOCKLIST_LOCAL_TTL, revocations for as long as Redis keeps them
+blocklist_cache = LocalCache(Config.TOKEN_CACHE_SIZE)
 
 
 async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+    async with token_blocklist.pipeline(transaction=False) as pipe:
+        pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+        pipe.publish(BLOCKLIST_CHANNEL, jti)
+        await pipe.execute()
+    _revoke_locally(jti)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
+    revoked = blocklist_cache.get(jti)
+    if revoked is not None:
+        return revoked
+
+    revoked = await token_blocklist.exists(jti) > 0
+    blocklist_cache.set(jti, revoked, time.time() + (JTI_EXPIRY if revoked else Config.BLOCKLIST_LOCAL_TTL))
+    return revoked
+
+
+@on_invalidation(BLOCKLIST_CHANNEL, blocklist_cache)
+def _revoke_locally(jti: str) -> None:
+    blocklist_cache.set(jti, True, time.time() + JTI_EXPIRY)
+
 
-    return jti is not None
\ No newline at end of file
+async def listen_for_invalidations() -> None:
+    """
+    Apply invalidations published by any worker to this process's local caches, e.g. revocations,
+    so a cached "not revoked" answer is overridden at once. Runs for the lifetime of the app; if the
+    subscription drops, local caches are cleared and stale answers are bounded by their TTLs.
+    """
+    while True:
+        try:
+            async with redis_client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(*_channel_handlers)
+                async for message in pubsub.listen():
+                    for handler, _ in _channel_handlers[message["channel"].decode()]:
+                        handler(message["data"].decode())
+        except RedisError as e:
+            # Messages may have been missed while disconnected
+            logging.warning("Invalidation subscription lost, retrying: %s", e)
+            for handlers in _channel_handlers.values():
+                for _, cache in handlers:
+                    cache.clear()
+            await asyncio.sleep(1)
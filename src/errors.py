@@ -77,6 +77,24 @@ class UserNotActive(CustomException):
     pass
 
 
+class CopyNotAvailable(CustomException):
+    """Book copy is already borrowed"""
+
+    pass
+
+
+class LoanLimitReached(CustomException):
+    """Patron has as many open loans as their role allows"""
+
+    pass
+
+
+class ExtensionLimitReached(CustomException):
+    """Borrowing has been extended as often as the patron's role allows"""
+
+    pass
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -207,6 +225,39 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        CopyNotAvailable,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Book copy is not available",
+                "error_code": "copy_not_available",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        LoanLimitReached,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Loan limit reached",
+                "error_code": "loan_limit_reached",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ExtensionLimitReached,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Extension limit reached",
+                "error_code": "extension_limit_reached",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
 
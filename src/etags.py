@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Sequence
+
+from fastapi import Request, Response
+
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak validator: equal ETags mean an equivalent representation, not identical bytes."""
+    digest = hashlib.sha1("|".join(_part(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _part(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def http_date(value: datetime) -> str:
+    # updated_at is stored as naive local time
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"etag": etag}
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+    return headers
+
+
+def row_validators(key: str, updated_at: Optional[datetime]) -> Dict[str, str]:
+    return validator_headers(make_etag(key, updated_at), updated_at)
+
+
+def page_validators(kind: str, rows: Sequence) -> Dict[str, str]:
+    """Validators of a list page; rows need ``id`` and ``updated_at`` (ORM objects or plain rows)."""
+    etag = make_etag(kind, *(f"{row.id}@{_part(row.updated_at)}" for row in rows))
+    last_modified = max((row.updated_at for row in rows if row.updated_at is not None), default=None)
+    return validator_headers(etag, last_modified)
+
+
+def is_conditional(request: Request) -> bool:
+    return any(name in request.headers for name in CONDITIONAL_HEADERS)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, headers: Dict[str, str], use_last_modified: bool = True) -> bool:
+    """
+    Evaluate If-None-Match (weak comparison) or, when it is absent, If-Modified-Since.
+    List pages pass ``use_last_modified=False``: removing a row does not move their Last-Modified.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, headers["etag"])
+    if_modified_since = request.headers.get("if-modified-since")
+    if not use_last_modified or if_modified_since is None or "last-modified" not in headers:
+        return False
+    try:
+        return parsedate_to_datetime(headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def set_validators(response: Response, headers: Dict[str, str]) -> None:
+    response.headers.update(headers)
@@ -1,8 +1,9 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
 
 class FilterParams(BaseModel):
     limit: int = Field(100, gt=0, le=100)
-    offset: int = Field(0, ge=0)
\ No newline at end of file
+    offset: int = Field(0, ge=0)
+    after: Optional[str] = Field(None, description="Opaque cursor from the X-Next-Cursor header; overrides offset")
@@ -0,0 +1,71 @@
+from typing import List, Annotated
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.borrowings.schemas import BorrowingModel, HoldClaimModel
+from src.borrowings.services import BorrowService
+from src.db.main import get_session
+from src.pagination import set_next_cursor
+from . import schemas
+from .services import HoldService, HOLD_ORDER
+from ..auth.dependencies import get_current_user
+from ..auth.principal import UserPrincipal
+
+router = APIRouter()
+
+hold_service = HoldService()
+borrow_service = BorrowService()
+
+
+async def _with_position(session: AsyncSession, hold) -> schemas.HoldResponseModel:
+    response = schemas.HoldResponseModel.model_validate(hold)
+    response.position = await hold_service.queue_position(session, hold)
+    return response
+
+
+@router.post("/", response_model=schemas.HoldResponseModel)
+async def place_hold(hold: schemas.HoldCreateModel, session: AsyncSession = Depends(get_session),
+                     current_user: UserPrincipal = Depends(get_current_user)):
+    new_hold = await hold_service.place_hold(session, hold.book_id, current_user)
+    return await _with_position(session, new_hold)
+
+
+@router.get("/{hold_id}", response_model=schemas.HoldResponseModel)
+async def read_hold(hold_id: int, session: AsyncSession = Depends(get_session),
+                    current_user: UserPrincipal = Depends(get_current_user)):
+    hold = await hold_service.get_hold(session, hold_id, current_user)
+    if not hold:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return await _with_position(session, hold)
+
+
+@router.get("/", response_model=List[schemas.HoldResponseModel])
+async def read_holds(filter_params: Annotated[schemas.HoldFilterParams, Query()], response: Response,
+                     session: AsyncSession = Depends(get_session),
+                     current_user: UserPrincipal = Depends(get_current_user)):
+    holds = await hold_service.get_holds(session, current_user, **filter_params.model_dump())
+    set_next_cursor(response, holds, HOLD_ORDER, filter_params.limit)
+    positions = await hold_service.queue_positions(session, holds)
+    return [
+        schemas.HoldResponseModel.model_validate(hold).model_copy(update={"position": positions.get(hold.id)})
+        for hold in holds
+    ]
+
+
+@router.post("/{hold_id}/claim", response_model=BorrowingModel)
+async def claim_hold(hold_id: int, claim: HoldClaimModel, session: AsyncSession = Depends(get_session),
+                     current_user: UserPrincipal = Depends(get_current_user)):
+    borrowing = await borrow_service.claim_hold(session, hold_id, claim, current_user)
+    if not borrowing:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return borrowing
+
+
+@router.delete("/{hold_id}", response_model=schemas.HoldModel)
+async def cancel_hold(hold_id: int, session: AsyncSession = Depends(get_session),
+                      current_user: UserPrincipal = Depends(get_current_user)):
+    hold = await hold_service.cancel_hold(session, hold_id, current_user)
+    if not hold:
+        raise HTTPException(status_code=404, detail="Hold not found")
+    return hold
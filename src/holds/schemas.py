@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import SQLModel
+
+from src.db.enums import HoldStatus
+from src.filters import FilterParams
+
+
+class HoldCreateModel(SQLModel):
+    book_id: int
+
+
+class HoldModel(SQLModel):
+    id: int
+    book_id: int
+    user_id: int
+    copy_id: Optional[int]
+    status: HoldStatus
+    created_at: datetime
+    ready_at: Optional[datetime]
+    expires_at: Optional[datetime]
+
+
+class HoldResponseModel(HoldModel):
+    position: Optional[int] = None
+
+
+class HoldFilterParams(FilterParams):
+    book_id: Optional[int] = None
+    status: Optional[HoldStatus] = None
@@ -0,0 +1,229 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.availability import adjust_availability, adjust_availability_many, copies_changed, set_copy_status
+from src.books.cache import catalog_cache
+from src.config import Config
+from src.db.enums import BookCopyStatus, HoldStatus
+from src.db.models import Book, BookCopy, Hold, User
+from src.pagination import paginate
+from ..errors import BookNotFound, InsufficientPermission
+
+HOLD_ORDER = (Hold.id,)
+ACTIVE_HOLD_STATUSES = (HoldStatus.WAITING, HoldStatus.READY)
+
+
+async def _next_waiting_hold(session: AsyncSession, book_id: int) -> Optional[Hold]:
+    """
+    Head of a book's queue: one descent of ix_holds_waiting_book_id_id however long the queue is.
+    SKIP LOCKED lets concurrent returns of the same title take successive holds instead of queueing.
+    """
+    result = await session.exec(
+        select(Hold)
+        .where(Hold.book_id == book_id, Hold.status == HoldStatus.WAITING)
+        .order_by(Hold.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    return result.first()
+
+
+async def hand_over_copy(session: AsyncSession, copy_id: int, book_id: int) -> None:
+    """
+    Give a reserved copy to the next waiting hold on its book, or put it back on the shelf.
+    The caller has already moved the copy to ``reserved``, which also locks it.
+    """
+    hold = await _next_waiting_hold(session, book_id)
+    if hold is None:
+        await set_copy_status(session, copy_id, BookCopyStatus.RESERVED, BookCopyStatus.AVAILABLE)
+        await adjust_availability(session, book_id, available=1)
+        return
+    now = datetime.now()
+    hold.status = HoldStatus.READY
+    hold.copy_id = copy_id
+    hold.ready_at = now
+    hold.expires_at = now + timedelta(days=Config.HOLD_PICKUP_DAYS)
+    session.add(hold)
+
+
+async def release_copy(session: AsyncSession, copy_id: int) -> Optional[int]:
+    """Take back a borrowed copy; returns its book id, or None if the copy was not borrowed."""
+    book_id = await set_copy_status(session, copy_id, BookCopyStatus.BORROWED, BookCopyStatus.RESERVED)
+    if book_id is not None:
+        await hand_over_copy(session, copy_id, book_id)
+    return book_id
+
+
+async def release_copies(session: AsyncSession, copy_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Set-based release_copy for many copies; returns {copy id: book id} of those that were borrowed.
+    Copies of books nobody is waiting for go back on the shelf in one UPDATE; the others are
+    handed over one by one.
+    """
+    result = await session.exec(
+        update(BookCopy)
+        .where(BookCopy.id.in_(list(copy_ids)), BookCopy.status == BookCopyStatus.BORROWED)
+        .values(status=BookCopyStatus.RESERVED)
+        .returning(BookCopy.id, BookCopy.book_id)
+        .execution_options(synchronize_session=False)
+    )
+    released = dict(result.all())
+    if not released:
+        return released
+    result = await session.exec(
+        select(Hold.book_id)
+        .where(Hold.book_id.in_(set(released.values())), Hold.status == HoldStatus.WAITING)
+        .distinct()
+    )
+    queued = set(result.all())
+
+    shelved = {copy_id: book_id for copy_id, book_id in released.items() if book_id not in queued}
+    if shelved:
+        await session.exec(
+            update(BookCopy)
+            .where(BookCopy.id.in_(list(shelved)))
+            .values(status=BookCopyStatus.AVAILABLE)
+            .execution_options(synchronize_session=False)
+        )
+        available = {}
+        for book_id in shelved.values():
+            available[book_id] = available.get(book_id, 0) + 1
+        await adjust_availability_many(session, available)
+    for copy_id, book_id in released.items():
+        if book_id in queued:
+            await hand_over_copy(session, copy_id, book_id)
+    return released
+
+
+async def _close_ready_hold(session: AsyncSession, hold: Hold, status: HoldStatus) -> None:
+    """Cancel or expire a ready hold and pass its copy on; the caller stamps the copy with copies_changed."""
+    hold.status = status
+    session.add(hold)
+    await hand_over_copy(session, hold.copy_id, hold.book_id)
+
+
+async def expire_holds(session: AsyncSession, batch_size: int = None) -> int:
+    """
+    Expire ready holds that were not picked up in time and pass their copies on,
+    a batch at a time so no batch holds its locks for long.
+    """
+    batch_size = batch_size or Config.HOLD_EXPIRY_BATCH_SIZE
+    total = 0
+    while True:
+        result = await session.exec(
+            select(Hold)
+            .where(Hold.status == HoldStatus.READY, Hold.expires_at < datetime.now())
+            .order_by(Hold.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        holds = result.all()
+        if not holds:
+            return total
+        for hold in holds:
+            await _close_ready_hold(session, hold, HoldStatus.EXPIRED)
+        stale_keys = await copies_changed(session, {hold.copy_id: hold.book_id for hold in holds})
+        await session.commit()
+        await catalog_cache.invalidate(stale_keys)
+        total += len(holds)
+
+
+class HoldService:
+    async def queue_positions(self, session: AsyncSession, holds: Iterable[Hold]) -> Dict[int, int]:
+        """
+        1-based places in their books' queues of the waiting holds among ``holds``, keyed by hold id.
+        One query for the whole page: row_number() over each book's queue, read in order from
+        ix_holds_waiting_book_id_id up to the last hold asked for.
+        """
+        waiting = [hold for hold in holds if hold.status == HoldStatus.WAITING]
+        if not waiting:
+            return {}
+        queue = (
+            select(
+                Hold.id,
+                func.row_number().over(partition_by=Hold.book_id, order_by=Hold.id).label("position"),
+            )
+            .where(
+                Hold.book_id.in_({hold.book_id for hold in waiting}),
+                Hold.status == HoldStatus.WAITING,
+                Hold.id <= max(hold.id for hold in waiting),
+            )
+            .subquery()
+        )
+        result = await session.exec(
+            select(queue.c.id, queue.c.position).where(queue.c.id.in_([hold.id for hold in waiting]))
+        )
+        return dict(result.all())
+
+    async def queue_position(self, session: AsyncSession, hold: Hold) -> Optional[int]:
+        return (await self.queue_positions(session, [hold])).get(hold.id)
+
+    async def place_hold(self, session: AsyncSession, book_id: int, user: User) -> Hold:
+        book = await session.get(Book, book_id)
+        if book is None:
+            raise BookNotFound()
+        if book.available_copies > 0:
+            raise ValueError("Book has available copies; borrow one instead")
+        result = await session.exec(
+            select(Hold.id).where(
+                Hold.user_id == user.id, Hold.book_id == book_id, Hold.status.in_(ACTIVE_HOLD_STATUSES)
+            )
+        )
+        if result.first() is not None:
+            raise ValueError("You already have a hold on this book")
+        hold = Hold(book_id=book_id, user_id=user.id)
+        session.add(hold)
+        try:
+            await session.commit()
+        except IntegrityError:
+            # A concurrent request placed the same hold first (ux_holds_active_user_id_book_id)
+            await session.rollback()
+            raise ValueError("You already have a hold on this book")
+        return hold
+
+    async def get_hold(self, session: AsyncSession, hold_id: int, user: User, for_update: bool = False):
+        statement = select(Hold).where(Hold.id == hold_id)
+        if for_update:
+            statement = statement.with_for_update().execution_options(populate_existing=True)
+        result = await session.exec(statement)
+        hold = result.first()
+        if hold is None:
+            return None
+        if not user.is_librarian() and hold.user_id != user.id:
+            raise InsufficientPermission()
+        return hold
+
+    async def get_holds(self, session: AsyncSession, user: User, book_id: Optional[int] = None,
+                        status: Optional[HoldStatus] = None, offset: int = 0, limit: int = 10,
+                        after: Optional[str] = None):
+        statement = select(Hold)
+        if not user.is_librarian():
+            statement = statement.where(Hold.user_id == user.id)
+        if book_id is not None:
+            statement = statement.where(Hold.book_id == book_id)
+        if status is not None:
+            statement = statement.where(Hold.status == status)
+        result = await session.exec(paginate(statement, HOLD_ORDER, limit, offset=offset, after=after))
+        return result.all()
+
+    async def cancel_hold(self, session: AsyncSession, hold_id: int, user: User):
+        hold = await self.get_hold(session, hold_id, user, for_update=True)
+        if hold is None:
+            return None
+        if hold.status not in ACTIVE_HOLD_STATUSES:
+            raise ValueError("Hold is no longer active")
+        stale_keys = set()
+        if hold.status == HoldStatus.READY:
+            await _close_ready_hold(session, hold, HoldStatus.CANCELLED)
+            stale_keys = await copies_changed(session, {hold.copy_id: hold.book_id})
+        else:
+            hold.status = HoldStatus.CANCELLED
+            session.add(hold)
+        await session.commit()
+        await catalog_cache.invalidate(stale_keys)
+        return hold
@@ -16,6 +16,7 @@ mail_config = ConnectionConfig(
     MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
     USE_CREDENTIALS=Config.USE_CREDENTIALS,
     VALIDATE_CERTS=Config.VALIDATE_CERTS,
+    TEMPLATE_FOLDER=BASE_DIR / "templates",
 )
 
 
@@ -29,3 +30,12 @@ def create_message(recipients: list[str], subject: str, body: str):
     )
 
     return message
+
+
+def create_template_message(recipients: list[str], subject: str, template_body: dict):
+
+    message = MessageSchema(
+        recipients=recipients, subject=subject, template_body=template_body, subtype=MessageType.html
+    )
+
+    return message
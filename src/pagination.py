@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime, date
+from typing import Any, Optional, Sequence
+
+from fastapi import Response
+from sqlalchemy import tuple_, Date, DateTime
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _to_json(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value: Any, column):
+    if value is None:
+        return value
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order_by: Sequence) -> tuple:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            raise ValueError
+        return tuple(_from_json(value, column) for value, column in zip(values, order_by))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def paginate(statement, order_by: Sequence, limit: int, offset: int = 0, after: Optional[str] = None):
+    """
+    Apply a stable ordering and either keyset (``after``) or offset pagination to a select.
+    ``order_by`` must end in a unique column so that the ordering is total.
+    """
+    statement = statement.order_by(*order_by)
+    if after:
+        statement = statement.where(tuple_(*order_by) > tuple_(*decode_cursor(after, order_by)))
+    elif offset:
+        statement = statement.offset(offset)
+    return statement.limit(limit)
+
+
+def next_cursor(rows: Sequence, order_by: Sequence, limit: int) -> Optional[str]:
+    """Cursor pointing after the last row, or None when the page was not full."""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([getattr(last, column.key) for column in order_by])
+
+
+def set_next_cursor(response: Response, rows: Sequence, order_by: Sequence, limit: int) -> None:
+    cursor = next_cursor(rows, order_by, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,204 @@
+"""
+Token-bucket rate limiting of API requests, shared by all workers through Redis.
+Each request takes one token from a single bucket: login attempts per client IP (and per account),
+requests with a verified bearer token per user, requests with a known API key per key and anything
+else per IP.
+Buckets refill continuously; an empty bucket answers 429 with ``Retry-After``.
+When Redis is unreachable each process falls back to its own buckets for RATE_LIMIT_REDIS_RETRY
+seconds, so limits then apply per worker rather than not at all.
+"""
+import json
+import logging
+import math
+import time
+from typing import Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+
+from src.auth.api_keys import api_key_cache
+from src.auth.utils import decode_token_cached, generate_hash_key
+from src.cache import LocalCache
+from src.config import Config
+
+PERIODS = {"s": 1, "m": 60, "h": 3600}
+# Login bodies larger than this are passed on without an account bucket
+LOGIN_BODY_MAX_SIZE = 4096
+
+# KEYS[1]: bucket, ARGV: capacity, refill rate per second. Returns 0 if a token was taken,
+# otherwise the milliseconds until one is available. Uses the server clock, so workers agree on time.
+TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return wait
+"""
+
+
+class RatePolicy(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    capacity: int
+    rate: float  # tokens per second
+
+    @classmethod
+    def parse(cls, name: str, value: str) -> "RatePolicy":
+        """``"100/m"``: bursts of up to 100 requests, refilled at 100 per minute."""
+        count, _, period = value.partition("/")
+        return cls(name=name, capacity=int(count), rate=int(count) / PERIODS[period or "s"])
+
+
+LOGIN_POLICY = RatePolicy.parse("login", Config.RATE_LIMIT_LOGIN)
+LOGIN_ACCOUNT_POLICY = RatePolicy.parse("login_account", Config.RATE_LIMIT_LOGIN_ACCOUNT)
+IP_POLICY = RatePolicy.parse("ip", Config.RATE_LIMIT_IP)
+USER_POLICY = RatePolicy.parse("user", Config.RATE_LIMIT_USER)
+API_KEY_POLICY = RatePolicy.parse("key", Config.RATE_LIMIT_API_KEY)
+
+
+class RateLimiter:
+    def __init__(self, client: Redis, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self.script = client.register_script(TOKEN_BUCKET)
+        # Fallback buckets: key -> (tokens, updated at)
+        self.local = LocalCache(Config.RATE_LIMIT_LOCAL_SIZE)
+        self._redis_retry_at = 0.0
+
+    async def take(self, key: str, policy: RatePolicy) -> float:
+        """Take a token from ``policy``'s bucket for ``key``; returns 0, or the seconds to wait if it is empty."""
+        if time.time() >= self._redis_retry_at:
+            try:
+                wait = await self.script(keys=[f"{self.prefix}:{policy.name}:{key}"],
+                                         args=[policy.capacity, policy.rate])
+                return wait / 1000
+            except RedisError as e:
+                logging.warning("Rate limiting per process for %ss, Redis failed: %s", Config.RATE_LIMIT_REDIS_RETRY, e)
+                self._redis_retry_at = time.time() + Config.RATE_LIMIT_REDIS_RETRY
+        return self._take_local(f"{policy.name}:{key}", policy)
+
+    def _take_local(self, key: str, policy: RatePolicy) -> float:
+        now = time.time()
+        tokens, updated_at = self.local.get(key) or (policy.capacity, now)
+        tokens = min(policy.capacity, tokens + (now - updated_at) * policy.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / policy.rate
+        self.local.set(key, (tokens, now), now + policy.capacity / policy.rate)
+        return wait
+
+
+async def _peek_body(receive, limit: int):
+    """
+    Read the request body if it is at most ``limit`` bytes (otherwise the body is None) and
+    return it with a ``receive`` that replays the consumed messages to the application.
+    """
+    messages, size, more_body = [], 0, True
+    while more_body and size <= limit:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    body = None
+    if not more_body and size <= limit and messages[-1]["type"] == "http.request":
+        body = b"".join(message.get("body", b"") for message in messages)
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return body, replay
+
+
+def _login_email(body: Optional[bytes]) -> Optional[str]:
+    if not body:
+        return None
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware limiting requests under ``prefix``. Callers are identified without touching
+    the database: bearer tokens through the verified-claims cache, API keys only once this
+    process has resolved them (until then they count against the client IP).
+    """
+
+    def __init__(self, app, limiter: RateLimiter, prefix: str, login_path: str):
+        self.app = app
+        self.limiter = limiter
+        self.prefix = prefix
+        self.login_path = login_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        key, policy = self.bucket(scope)
+        wait = await self.limiter.take(key, policy)
+        if not wait and scope["path"] == self.login_path:
+            # Also per account, so attempts spread over many addresses are throttled too
+            body, receive = await _peek_body(receive, LOGIN_BODY_MAX_SIZE)
+            email = _login_email(body)
+            if email is not None:
+                wait = await self.limiter.take(generate_hash_key(email), LOGIN_ACCOUNT_POLICY)
+        if wait > 0:
+            response = JSONResponse(
+                content={
+                    "message": "Too many requests",
+                    "resolution": f"Please retry in {math.ceil(wait)} seconds",
+                    "error_code": "rate_limited",
+                },
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def bucket(self, scope):
+        # Behind a proxy, run uvicorn with --proxy-headers so this is the client's address
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        if scope["path"] == self.login_path:
+            return client_ip, LOGIN_POLICY
+
+        headers = Headers(scope=scope)
+        api_key = headers.get("x-api-key")
+        if api_key:
+            hashed_key = generate_hash_key(api_key)
+            if api_key_cache.get(hashed_key) is not None:
+                return hashed_key, API_KEY_POLICY
+            return client_ip, IP_POLICY
+
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            claims = decode_token_cached(token)
+            if claims is not None:
+                return claims["user"]["user_id"], USER_POLICY
+        return client_ip, IP_POLICY
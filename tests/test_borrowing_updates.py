@@ -0,0 +1,80 @@
+"""PATCH of a borrowing: patron extensions, librarian-only status changes and reopening returned loans."""
+from datetime import date, datetime
+
+import pytest
+
+from src.auth.principal import UserPrincipal
+from src.borrowings.schemas import BorrowingCreateModel, BorrowingUpdateModel
+from src.borrowings.services import BorrowService
+from src.config import Config
+from src.db.enums import BookCopyStatus, BorrowingStatus, UserRole
+from src.db.models import Book, BookCopy
+from src.errors import ExtensionLimitReached, InsufficientPermission
+
+pytestmark = pytest.mark.anyio
+
+LIBRARIAN = UserPrincipal(id=5, email="patron4@example.com", role=UserRole.LIBRARIAN, is_active=True)
+
+
+def patron(user_id):
+    return UserPrincipal(id=user_id, email=f"patron{user_id - 1}@example.com", role=UserRole.USER, is_active=True)
+
+
+def update(**fields):
+    return BorrowingUpdateModel(**{"returned_date": None, "due_date": None, "extended_times": None,
+                                   "status": None, "notes": None, **fields})
+
+
+async def borrow(session_maker, copy_id, user_id):
+    async with session_maker() as session:
+        data = BorrowingCreateModel(copy_id=copy_id, user_id=user_id, due_date=date(2030, 1, 1),
+                                    status=BorrowingStatus.ACTIVE, notes=None)
+        return await BorrowService().create_borrowing(session, data)
+
+
+async def patch(session_maker, borrowing_id, user, **fields):
+    async with session_maker() as session:
+        return await BorrowService().update_borrowing(session, borrowing_id, update(**fields), user)
+
+
+async def test_patron_extends_up_to_the_limit(session_maker, catalog):
+    borrowing = await borrow(session_maker, 1, 1)
+    limit = Config.EXTENSION_LIMITS["user"]
+    for extension in range(1, limit + 1):
+        borrowing = await patch(session_maker, borrowing.id, patron(1), due_date=datetime(2030, 1, 1 + extension))
+        assert borrowing.extended_times == extension
+    with pytest.raises(ExtensionLimitReached):
+        await patch(session_maker, borrowing.id, patron(1), due_date=datetime(2030, 2, 1))
+    with pytest.raises(ValueError):
+        await patch(session_maker, borrowing.id, patron(1), due_date=datetime(2029, 12, 1))
+
+
+async def test_patron_cannot_return_or_touch_others(session_maker, catalog):
+    borrowing = await borrow(session_maker, 1, 1)
+    with pytest.raises(InsufficientPermission):
+        await patch(session_maker, borrowing.id, patron(1), status=BorrowingStatus.RETURNED)
+    with pytest.raises(InsufficientPermission):
+        await patch(session_maker, borrowing.id, patron(2), due_date=datetime(2030, 1, 2))
+    # Echoing unchanged fields is fine
+    borrowing = await patch(session_maker, borrowing.id, patron(1), status=BorrowingStatus.ACTIVE, notes="ok")
+    assert borrowing.notes == "ok"
+
+    async with session_maker() as session:
+        assert (await session.get(BookCopy, 1)).status == BookCopyStatus.BORROWED
+
+
+async def test_reopen_only_while_the_copy_is_on_the_shelf(session_maker, catalog):
+    first = await borrow(session_maker, 1, 1)
+    await patch(session_maker, first.id, LIBRARIAN, status=BorrowingStatus.RETURNED)
+    second = await borrow(session_maker, 1, 2)
+
+    with pytest.raises(ValueError, match="cannot be reopened"):
+        await patch(session_maker, first.id, LIBRARIAN, status=BorrowingStatus.LOST)
+
+    await patch(session_maker, second.id, LIBRARIAN, status=BorrowingStatus.RETURNED)
+    reopened = await patch(session_maker, first.id, LIBRARIAN, status=BorrowingStatus.LOST)
+    assert reopened.status == BorrowingStatus.LOST
+    async with session_maker() as session:
+        copy = await session.get(BookCopy, 1)
+        assert copy.status == BookCopyStatus.BORROWED
+        assert (await session.get(Book, copy.book_id)).available_copies == 1
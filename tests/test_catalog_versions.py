@@ -0,0 +1,77 @@
+"""
+Which rows a change stamps and which cached details it evicts. Author, category and publisher
+details list books as summaries, so only changes those summaries show reach them.
+"""
+from datetime import date
+
+import pytest
+
+from src.books import services
+from src.books.cache import author_key, book_key, catalog_cache, category_key, publisher_key
+from src.books.schemas import AuthorUpdateModel
+from src.borrowings.schemas import BorrowingCreateModel
+from src.borrowings.services import BorrowService
+from src.db.enums import BorrowingStatus
+from src.db.models import Author, Book, Category, Publisher
+
+pytestmark = pytest.mark.anyio
+
+
+async def no_search_vectors(session, book_ids):
+    pass
+
+
+async def versions(session_maker):
+    async with session_maker() as session:
+        return {
+            model.__name__: (await session.get(model, 1)).updated_at
+            for model in (Author, Book, Category, Publisher)
+        }
+
+
+async def cached(keys):
+    return {key for key in keys if await catalog_cache.client.exists(key)}
+
+
+async def test_parent_details_list_book_summaries(client, catalog):
+    for url in ("/api/v1/authors/1", "/api/v1/publishers/1", "/api/v1/categories/1"):
+        book = (await client.get(url)).json()["books"][0]
+        assert book["title"] == "Book 0"
+        assert not {"updated_at", "created_at", "total_copies", "available_copies"} & set(book)
+
+
+async def test_author_change_stamps_only_its_books(client, catalog, session_maker, monkeypatch):
+    monkeypatch.setattr(services, "refresh_search_vectors", no_search_vectors)
+    keys = [author_key(1), book_key(1), category_key(1), publisher_key(1)]
+    for url in ("/api/v1/authors/1", "/api/v1/books/1", "/api/v1/categories/1", "/api/v1/publishers/1"):
+        assert (await client.get(url)).status_code == 200
+    before = await versions(session_maker)
+
+    async with session_maker() as session:
+        await services.AuthorService().update_author(1, AuthorUpdateModel(first_name="U. K."), session)
+
+    after = await versions(session_maker)
+    assert after["Author"] > before["Author"]
+    assert after["Book"] > before["Book"]
+    assert after["Category"] == before["Category"]
+    assert after["Publisher"] == before["Publisher"]
+    assert await cached(keys) == {category_key(1), publisher_key(1)}
+
+
+async def test_checkout_stamps_only_the_book(client, catalog, session_maker):
+    keys = [author_key(1), book_key(1), category_key(1), publisher_key(1)]
+    for url in ("/api/v1/authors/1", "/api/v1/books/1", "/api/v1/categories/1", "/api/v1/publishers/1"):
+        assert (await client.get(url)).status_code == 200
+    before = await versions(session_maker)
+
+    async with session_maker() as session:
+        data = BorrowingCreateModel(copy_id=1, user_id=1, due_date=date(2030, 1, 1),
+                                    status=BorrowingStatus.ACTIVE, notes=None)
+        await BorrowService().create_borrowing(session, data)
+
+    after = await versions(session_maker)
+    assert after["Book"] > before["Book"]
+    assert {name: after[name] for name in ("Author", "Category", "Publisher")} == \
+           {name: before[name] for name in ("Author", "Category", "Publisher")}
+    assert await cached(keys) == {author_key(1), category_key(1), publisher_key(1)}
+    assert (await client.get("/api/v1/books/1")).json()["available_copies"] == 1
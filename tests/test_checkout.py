@@ -0,0 +1,116 @@
+"""
+Checkout claims a copy with a conditional UPDATE (and, picking any copy of a title, FOR UPDATE
+SKIP LOCKED), so concurrent requests never lend one copy twice and the counters stay in step.
+The concurrent tests need Postgres row locks; SQLite would serialize them on its database lock.
+"""
+import asyncio
+import statistics
+import time
+from datetime import date
+
+import pytest
+from sqlmodel import func, select
+
+from src.borrowings.schemas import BorrowingByBookCreateModel, BorrowingCreateModel
+from src.borrowings.services import BorrowService
+from src.db.enums import BookCopyStatus, BorrowingStatus
+from src.db.models import Book, BookCopy, Borrowing, User
+from src.errors import CopyNotAvailable
+
+pytestmark = pytest.mark.anyio
+
+# Stays within the engine's default pool (5 + 10 overflow), so latencies are not pool waits
+CONCURRENCY = 10
+EXTRA_COPIES = 20
+
+
+async def checkout(session_maker, copy_id, user_id):
+    async with session_maker() as session:
+        data = BorrowingCreateModel(copy_id=copy_id, user_id=user_id, due_date=date(2030, 1, 1),
+                                    status=BorrowingStatus.ACTIVE, notes=None)
+        return await BorrowService().create_borrowing(session, data)
+
+
+async def borrow_any(session_maker, book_id, user_id):
+    async with session_maker() as session:
+        data = BorrowingByBookCreateModel(due_date=date(2030, 1, 1))
+        return await BorrowService().borrow_book(session, book_id, data, user_id)
+
+
+async def run_concurrently(calls):
+    """Run ``calls`` (coroutine factories) CONCURRENCY at a time; returns (results, latencies in ms)."""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def timed(call):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await call()
+            except Exception as e:
+                result = e
+            return result, (time.perf_counter() - start) * 1000
+
+    timings = await asyncio.gather(*(timed(call) for call in calls))
+    return [result for result, _ in timings], [latency for _, latency in timings]
+
+
+def report(name, latencies):
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    p50, p99 = cuts[49], cuts[98]
+    print(f"{name}: {len(latencies)} checkouts, p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    return p99
+
+
+async def test_checkout_of_borrowed_copy(session_maker, catalog):
+    await checkout(session_maker, 1, 1)
+    with pytest.raises(CopyNotAvailable):
+        await checkout(session_maker, 1, 2)
+
+
+async def test_concurrent_checkouts_of_one_copy(pg_session_maker, pg_catalog):
+    async with pg_session_maker() as session:
+        user_ids = (await session.exec(select(User.id))).all()
+
+    results, latencies = await run_concurrently(
+        [lambda user_id=user_ids[index % len(user_ids)]: checkout(pg_session_maker, 1, user_id)
+         for index in range(CONCURRENCY)]
+    )
+    report("one copy", latencies)
+
+    borrowings = [result for result in results if isinstance(result, Borrowing)]
+    assert len(borrowings) == 1
+    assert all(isinstance(result, CopyNotAvailable) for result in results if result not in borrowings)
+    async with pg_session_maker() as session:
+        copy = await session.get(BookCopy, 1)
+        book = await session.get(Book, copy.book_id)
+        assert copy.status == BookCopyStatus.BORROWED
+        assert book.available_copies == 1
+        assert (await session.exec(select(func.count()).select_from(Borrowing))).one() == 1
+        assert (await session.exec(select(func.sum(User.active_loans)))).one() == 1
+
+
+async def test_checkout_load_on_one_title(pg_session_maker, pg_catalog):
+    async with pg_session_maker() as session:
+        session.add_all(BookCopy(book_id=1, copy_number=f"load-{index}", status=BookCopyStatus.AVAILABLE)
+                        for index in range(EXTRA_COPIES))
+        book = await session.get(Book, 1)
+        book.total_copies += EXTRA_COPIES
+        book.available_copies += EXTRA_COPIES
+        await session.commit()
+        copies = book.available_copies
+        user_ids = (await session.exec(select(User.id))).all()
+
+    requests = copies * 2
+    results, latencies = await run_concurrently(
+        [lambda user_id=user_ids[index % len(user_ids)]: borrow_any(pg_session_maker, 1, user_id)
+         for index in range(requests)]
+    )
+    p99 = report("one title", latencies)
+
+    borrowings = [result for result in results if isinstance(result, Borrowing)]
+    assert len({borrowing.copy_id for borrowing in borrowings}) == len(borrowings) == copies
+    assert all(isinstance(result, CopyNotAvailable) for result in results if result not in borrowings)
+    async with pg_session_maker() as session:
+        assert (await session.get(Book, 1)).available_copies == 0
+    # Generous: queueing behind a locked copy instead of skipping it would take seconds
+    assert p99 < 1000
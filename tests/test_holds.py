@@ -0,0 +1,30 @@
+"""Queue positions of a page of holds, computed in one statement."""
+import pytest
+
+from src.db.enums import HoldStatus
+from src.db.models import Hold
+from src.holds.services import HoldService
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_queue_positions_of_a_page(session_maker, catalog, statements):
+    async with session_maker() as session:
+        holds = [
+            Hold(book_id=1, user_id=1),
+            Hold(book_id=2, user_id=1),
+            Hold(book_id=1, user_id=2, status=HoldStatus.CANCELLED),
+            Hold(book_id=1, user_id=3),
+            Hold(book_id=2, user_id=2),
+            Hold(book_id=1, user_id=4),
+        ]
+        session.add_all(holds)
+        await session.commit()
+        page = [await session.get(Hold, index) for index in (2, 3, 4, 5)]
+
+        statements.clear()
+        positions = await HoldService().queue_positions(session, page)
+        assert len(statements) == 1
+        assert positions == {2: 1, 4: 2, 5: 2}
+        assert await HoldService().queue_position(session, page[1]) is None
+        assert await HoldService().queue_position(session, holds[5]) == 3
@@ -0,0 +1,52 @@
+"""Books imported without the optional columns read back through every endpoint that shows them."""
+import pytest
+from sqlmodel import select
+
+from src.books.imports import BookImportService
+from src.db.models import Book, BookAuthor, BookCategory
+
+pytestmark = pytest.mark.anyio
+
+SPARSE_URLS = ("/api/v1/books/{id}", "/api/v1/books/", "/api/v1/authors/1", "/api/v1/publishers/1",
+               "/api/v1/categories/1")
+
+
+async def lines(*rows):
+    for row in rows:
+        yield row + "\n"
+
+
+async def assert_sparse_book_reads_back(client, book_id):
+    for url in SPARSE_URLS:
+        response = await client.get(url.format(id=book_id))
+        assert response.status_code == 200, response.text
+        body = response.json()
+        books = body if isinstance(body, list) else body.get("books", [body])
+        book = next(book for book in books if book["id"] == book_id)
+        assert book["publication_date"] is None
+        assert book["edition"] is None
+
+
+async def test_sparse_book_reads_back(client, catalog, session_maker):
+    async with session_maker() as session:
+        book = Book(isbn="9780000000099", title="Sparse", publisher_id=catalog["publisher_id"])
+        session.add(book)
+        await session.flush()
+        session.add_all([BookAuthor(book_id=book.id, author_id=catalog["author_id"]),
+                         BookCategory(book_id=book.id, category_id=catalog["category_id"])])
+        await session.commit()
+
+    await assert_sparse_book_reads_back(client, book.id)
+
+
+async def test_import_sparse_row(pg_client, pg_catalog, pg_session_maker):
+    catalog = pg_catalog
+    row = (f'{{"isbn": "9780000000099", "title": "Sparse", "publisher_id": {catalog["publisher_id"]}, '
+           f'"authors": [{catalog["author_id"]}], "categories": [{catalog["category_id"]}]}}')
+    async with pg_session_maker() as session:
+        report = await BookImportService().import_books(session, lines(row), "ndjson")
+    assert (report.inserted, report.failed) == (1, 0)
+
+    async with pg_session_maker() as session:
+        book_id = (await session.exec(select(Book.id).where(Book.isbn == "9780000000099"))).one()
+    await assert_sparse_book_reads_back(pg_client, book_id)
@@ -0,0 +1,17 @@
+import pytest
+
+from src.borrowings.services import BORROWING_ORDER
+from src.pagination import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("values", [[5, 1], [["2026-01-01"], 1], ["2026-01-01T00:00:00"], {"id": 1}])
+def test_tampered_cursor_is_invalid(values):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(encode_cursor(values), BORROWING_ORDER)
+
+
+async def test_tampered_cursor_is_a_bad_request(client, catalog):
+    for after in ("not a cursor", encode_cursor(["Book 0"]), encode_cursor([1, 2, 3])):
+        assert (await client.get("/api/v1/books/", params={"after": after})).status_code == 400
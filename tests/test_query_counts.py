@@ -0,0 +1,31 @@
+"""
+Catalog endpoints load exactly what their response models need, so each request sends a
+fixed number of statements instead of cascading through every relationship of the rows.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def count_statements(client, statements, url):
+    statements.clear()
+    response = await client.get(url)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("/api/v1/books/", 4),
+    ("/api/v1/books/1", 4),
+    ("/api/v1/authors/1", 2),
+    ("/api/v1/publishers/1", 2),
+    ("/api/v1/categories/", 2),
+    ("/api/v1/book_copies/", 1),
+])
+async def test_statement_count(client, statements, catalog, url, expected):
+    assert await count_statements(client, statements, url) == expected
+
+
+async def test_cached_detail_skips_the_database(client, statements, catalog):
+    await count_statements(client, statements, "/api/v1/books/1")
+    assert await count_statements(client, statements, "/api/v1/books/1") == 0
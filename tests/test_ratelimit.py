@@ -0,0 +1,113 @@
+"""Token buckets, the 429 response and the per-process fallback used while Redis is down."""
+import httpx
+import pytest
+from fakeredis import aioredis as fake_aioredis
+from redis.exceptions import ConnectionError
+from starlette.responses import PlainTextResponse
+
+from src import ratelimit
+from src.config import Config
+from src.ratelimit import RateLimiter, RateLimitMiddleware, RatePolicy
+
+pytestmark = pytest.mark.anyio
+
+POLICY = RatePolicy(name="test", capacity=2, rate=1.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen ``time.time()``; advance it by adding to ``clock[0]``."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def redis_down():
+    """A limiter whose Redis calls fail; counts the attempts."""
+    limiter = RateLimiter(fake_aioredis.FakeRedis())
+    limiter.attempts = 0
+
+    async def script(keys, args):
+        limiter.attempts += 1
+        raise ConnectionError("Connection refused")
+
+    limiter.script = script
+    return limiter
+
+
+async def echo(scope, receive, send):
+    body, more_body = b"", True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    await PlainTextResponse(body)(scope, receive, send)
+
+
+def client_from(limiter, ip="10.0.0.1"):
+    app = RateLimitMiddleware(echo, limiter, prefix="/api", login_path="/api/auth/login")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=(ip, 1234)), base_url="http://test")
+
+
+async def test_local_bucket_refills(redis_down, clock):
+    assert await redis_down.take("a", POLICY) == 0
+    assert await redis_down.take("a", POLICY) == 0
+    assert await redis_down.take("a", POLICY) == pytest.approx(1.0)
+    assert await redis_down.take("b", POLICY) == 0
+
+    clock[0] += 0.5
+    assert await redis_down.take("a", POLICY) == pytest.approx(0.5)
+    clock[0] += 1
+    assert await redis_down.take("a", POLICY) == 0
+
+
+async def test_redis_is_retried_after_a_pause(redis_down, clock):
+    await redis_down.take("a", POLICY)
+    await redis_down.take("a", POLICY)
+    assert redis_down.attempts == 1
+
+    clock[0] += Config.RATE_LIMIT_REDIS_RETRY
+    await redis_down.take("a", POLICY)
+    assert redis_down.attempts == 2
+
+
+async def test_redis_bucket_is_shared():
+    pytest.importorskip("lupa", reason="fakeredis runs Lua scripts through lupa")
+    client = fake_aioredis.FakeRedis()
+    first, second = RateLimiter(client), RateLimiter(client)
+
+    assert await first.take("a", POLICY) == 0
+    assert await second.take("a", POLICY) == 0
+    assert 0 < await first.take("a", POLICY) <= 1
+
+
+async def test_empty_bucket_answers_429(redis_down, monkeypatch):
+    monkeypatch.setattr(ratelimit, "IP_POLICY", RatePolicy.parse("ip", "2/m"))
+    async with client_from(redis_down) as client:
+        assert (await client.get("/api/books/")).status_code == 200
+        assert (await client.get("/api/books/")).status_code == 200
+        response = await client.get("/api/books/")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "30"
+        assert response.json()["error_code"] == "rate_limited"
+
+        assert (await client.get("/docs")).status_code == 200
+    async with client_from(redis_down, ip="10.0.0.2") as client:
+        assert (await client.get("/api/books/")).status_code == 200
+
+
+async def test_login_attempts_are_limited_per_account(redis_down, monkeypatch):
+    monkeypatch.setattr(ratelimit, "LOGIN_ACCOUNT_POLICY", RatePolicy.parse("login_account", "2/h"))
+    body = b'{"email": "Patron@Example.com", "password": "secret"}'
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        async with client_from(redis_down, ip) as client:
+            response = await client.post("/api/auth/login", content=body)
+            assert response.status_code == 200
+            assert response.content == body
+
+    async with client_from(redis_down, "10.0.0.3") as client:
+        response = await client.post("/api/auth/login", content=b'{"email": "patron@example.com "}')
+        assert response.status_code == 429
+        response = await client.post("/api/auth/login", content=b'{"email": "other@example.com"}')
+        assert response.status_code == 200
@@ -0,0 +1,94 @@
+"""Due-date reminder digests: which borrowings are reminded, and how the digests are mailed."""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from fastapi_mail import FastMail
+
+from src import celery_tasks
+from src.auth.principal import UserPrincipal
+from src.borrowings.schemas import BorrowingUpdateModel
+from src.borrowings.services import BorrowService, due_soon_digests
+from src.config import Config
+from src.db.enums import BorrowingStatus, UserRole
+from src.db.models import Borrowing
+from src.mail import mail_config
+
+LIBRARIAN = UserPrincipal(id=5, email="patron4@example.com", role=UserRole.LIBRARIAN, is_active=True)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    mail = FastMail(mail_config.model_copy(update={"SUPPRESS_SEND": 1}))
+    monkeypatch.setattr(celery_tasks, "mail", mail)
+    with mail.record_messages() as outbox:
+        yield outbox
+
+
+def test_send_reminder_digests(outbox):
+    digests = [
+        {"user_id": user_id, "email": f"patron{user_id}@example.com", "first_name": "Pat",
+         "books": [{"title": "Earthsea", "due_date": "2030-01-01"}]}
+        for user_id in range(3)
+    ]
+    celery_tasks.send_reminder_digests(digests)
+
+    assert len(outbox) == len(digests)
+    for message, digest in zip(outbox, digests):
+        assert digest["email"] in message["To"]
+        assert message["Subject"] == "Books due soon"
+        html = next(part for part in message.walk() if part.get_content_type() == "text/html")
+        assert "Earthsea" in html.get_payload(decode=True).decode()
+
+
+def due_in(days):
+    """Noon ``days`` from today, or a minute from now for today."""
+    if days == 0:
+        return datetime.now() + timedelta(minutes=1)
+    return datetime.combine(date.today() + timedelta(days=days), time(12))
+
+
+async def borrowings_due(session_maker, *days_ahead, **fields):
+    async with session_maker() as session:
+        borrowings = [
+            Borrowing(copy_id=1, user_id=1, due_date=due_in(days), status=BorrowingStatus.ACTIVE, **fields)
+            for days in days_ahead
+        ]
+        session.add_all(borrowings)
+        await session.commit()
+        return [borrowing.id for borrowing in borrowings]
+
+
+async def reminded(session_maker, days=None):
+    async with session_maker() as session:
+        return [borrowing_id async for digest in due_soon_digests(session, days)
+                for borrowing_id in digest["borrowing_ids"]]
+
+
+@pytest.mark.anyio
+async def test_due_soon_window(session_maker, catalog):
+    days = Config.REMINDER_DAYS_AHEAD
+    today, soon, last_day = await borrowings_due(session_maker, 0, 1, days)
+    await borrowings_due(session_maker, -1, days + 1)
+    await borrowings_due(session_maker, 1, reminded_at=datetime.now())
+
+    assert await reminded(session_maker) == [today, soon, last_day]
+    assert await reminded(session_maker, days=0) == [today]
+
+
+@pytest.mark.anyio
+async def test_each_borrowing_is_reminded_once(session_maker, catalog, monkeypatch):
+    queued = []
+    monkeypatch.setattr(celery_tasks, "task_session_maker", session_maker)
+    monkeypatch.setattr(celery_tasks.send_reminder_digests, "delay", queued.append)
+    borrowing_id, = await borrowings_due(session_maker, 1)
+
+    assert await celery_tasks._queue_due_reminders() == 1
+    assert await celery_tasks._queue_due_reminders() == 0
+    assert [digest["borrowing_ids"] for chunk in queued for digest in chunk] == [[borrowing_id]]
+
+    # A new due date is reminded of again
+    async with session_maker() as session:
+        update = BorrowingUpdateModel(returned_date=None, due_date=datetime.now() + timedelta(days=2),
+                                      extended_times=None, status=None, notes=None)
+        await BorrowService().update_borrowing(session, borrowing_id, update, LIBRARIAN)
+    assert await celery_tasks._queue_due_reminders() == 1